@@ -1,23 +1,140 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     # MongoDB
     mongo_uri: str
     database_name: str
+    mongo_op_budget_mode: str = "log"  # "off", "log" ou "raise" (budget d'opérations par endpoint)
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 10  # Connexions gardées ouvertes (et ouvertes au démarrage)
+    mongo_max_idle_time_ms: int = 300_000
+    mongo_compressors: str = "zlib"  # Ex: "zstd,snappy,zlib" si les bibliothèques sont installées
+    mongo_connect_timeout_ms: int = 5_000
+    mongo_server_selection_timeout_ms: int = 5_000
+    mongo_socket_timeout_ms: int = 10_000
+    mongo_email_collation: bool = False  # Index unique insensible à la casse sur l'email
+    mongo_monitoring: bool = True  # Statistiques par forme de requête (GET /stats/mongo)
+    mongo_slow_query_ms: float = 100.0
+    mongo_explain_new_shapes: bool = False  # Signaler les formes sans index (COLLSCAN)
+
+    # Identifiants
+    phone_default_country_code: Optional[str] = None  # Ex: "226" pour les numéros saisis sans indicatif
 
     # SMTP
     smtp_host: str
     smtp_port: int
     smtp_user: str
     smtp_password: str
+    smtp_start_tls: bool = True
+    smtp_pool_size: int = 4
+    smtp_keepalive_seconds: float = 30.0
+    smtp_timeout_seconds: float = 10.0
+    smtp_max_messages_per_connection: int = 100
+    # SMTP de secours (optionnel)
+    smtp_fallback_host: Optional[str] = None
+    smtp_fallback_port: int = 587
+    smtp_fallback_user: Optional[str] = None
+    smtp_fallback_password: Optional[str] = None
 
     # Twilio WhatsApp
     twilio_account_sid: str
     twilio_auth_token: str
     twilio_whatsapp_from: str
+    twilio_api_base_url: str = "https://api.twilio.com"
+    twilio_max_connections: int = 20
+    twilio_max_concurrency: int = 50
+    twilio_timeout_seconds: float = 10.0
+    twilio_sms_from: Optional[str] = None  # Secours SMS si WhatsApp est indisponible
+
+    # Disjoncteurs et timeouts des fournisseurs d'envoi
+    notifier_failure_threshold: int = 5
+    notifier_reset_timeout_seconds: float = 30.0
+    notifier_timeout_multiplier: float = 2.0  # Timeout = p95 récent x multiplicateur
+    notifier_timeout_min_seconds: float = 1.0
+    notifier_timeout_max_seconds: float = 15.0
+    notifier_hedging: bool = False  # Lancer le secours en parallèle au-delà du p95
+
+    # Hachage des mots de passe / PINs
+    hash_executor: str = "thread"  # "thread" ou "process"
+    hash_max_workers: int = 4
+    hash_max_queue: int = 64
+    hash_schemes: list[str] = ["bcrypt"]  # Le premier est utilisé, les autres sont dépréciés
+    hash_target_ms: float = 150.0  # Budget de latence visé par vérification
+    hash_calibrate: bool = True
+    hash_bcrypt_min_rounds: int = 10
+    hash_bcrypt_max_rounds: int = 15
+    hash_argon2_memory_kib: int = 65536
+    hash_argon2_parallelism: int = 2
+
+    # Codes de vérification
+    verification_backend: str = "memory"  # "memory" ou "mongo" (multi-workers)
+    verification_code_ttl_seconds: int = 600
+    verification_proof_ttl_seconds: int = 1800  # Validité de la preuve signée
+    verification_max_attempts: int = 5
+    verification_max_entries: int = 100_000
+    verification_resend_cooldown_seconds: int = 60
+
+    # Signature des tokens
+    jwt_algorithm: str = "EdDSA"  # "EdDSA" ou "ES256"
+    jwt_keys_dir: Optional[str] = None  # Répertoire des clés privées <kid>.pem (obligatoire)
+    jwt_active_kid: Optional[str] = None  # Par défaut : dernière clé par ordre de nom
+    jwt_allow_ephemeral_key: bool = False  # Développement uniquement : clé générée au démarrage, propre au processus
+    # Anciens tokens d'accès HS256 (sans kid) acceptés pendant la transition :
+    # désactivé par défaut, exige le secret réellement utilisé en production
+    jwt_accept_legacy_tokens: bool = False
+    jwt_legacy_secret: Optional[str] = None
+
+    # Cycle de vie de l'application
+    warmup_enabled: bool = True
+    shutdown_drain_seconds: float = 10.0
+
+    # Authentification des requêtes
+    auth_token_cache_size: int = 10_000
+    auth_revocation_sync_seconds: float = 5.0
+
+    # Déverrouillage rapide par appareil enrôlé
+    device_challenge_ttl_seconds: int = 60
+    device_max_failed_attempts: int = 5
+
+    # Limitation des tentatives de connexion / PIN (avant hachage)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" ou "mongo" (partagé entre workers)
+    rate_limit_max_keys: int = 100_000
+    rate_limit_trusted_proxy_hops: int = 0  # Proxys de confiance devant l'application (0 : X-Forwarded-For ignoré)
+    rate_limit_ip_burst: int = 30
+    rate_limit_ip_per_minute: float = 30.0
+    rate_limit_device_burst: int = 10
+    rate_limit_device_per_minute: float = 10.0
+    rate_limit_account_burst: int = 5
+    rate_limit_account_per_minute: float = 5.0
+
+    # Contrôle d'admission des endpoints coûteux (login, inscription, PIN)
+    admission_enabled: bool = True
+    admission_max_concurrency: int = 8  # Par classe d'endpoints
+    admission_max_queue: int = 32
+    admission_deadline_seconds: float = 2.0  # Au-delà, le client a probablement abandonné
+
+    # Cache des utilisateurs
+    user_cache_max_size: int = 10_000  # 0 pour désactiver
+    user_cache_ttl_seconds: float = 30.0
+    user_cache_invalidation: str = "capped"  # "capped" ou "change_stream" ("off" seulement si le cache est désactivé)
+
+    # Avatars par défaut
+    avatar_cache_size: int = 5000  # 7 couleurs x (26 + 26²) initiales ASCII = 4914
+    avatar_prerender: bool = False
+
+    # File d'envoi des notifications
+    notification_backend: str = "asyncio"  # "asyncio" ou "celery"
+    notification_workers: int = 4
+    notification_queue_size: int = 10_000
+    notification_max_attempts: int = 5
+    notification_retry_base_seconds: float = 1.0
+    notification_status_retention: int = 10_000
+    celery_broker_url: Optional[str] = None
+    celery_result_backend: Optional[str] = None
 
     class Config:
         env_file = ".env"
 
 settings = Settings()
-print(settings.dict())  # Vérifie que tout se charge
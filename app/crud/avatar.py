@@ -0,0 +1,120 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional, Dict, Any
+from datetime import datetime
+import asyncio
+import base64
+import binascii
+import hashlib
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Identifiant d'avatar : empreinte SHA-256 du contenu (hexadécimal)
+AVATAR_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def avatar_url(avatar_id: str) -> str:
+    """
+    URL publique d'un avatar stocké.
+    """
+    return f"/avatars/{avatar_id}"
+
+
+async def store_avatar(
+    db: AsyncIOMotorDatabase,
+    data: bytes,
+    content_type: str = "image/png",
+    avatar_id: Optional[str] = None
+) -> str:
+    """
+    Stocker un avatar dans la collection adressée par contenu.
+    Un contenu identique n'est stocké qu'une fois.
+    `avatar_id` évite de recalculer le hash s'il est déjà connu.
+
+    Returns:
+        str: Identifiant (hash SHA-256) de l'avatar
+    """
+    try:
+        avatar_id = avatar_id or hashlib.sha256(data).hexdigest()
+        await db.avatars.update_one(
+            {"_id": avatar_id},
+            {"$setOnInsert": {
+                "data": data,
+                "content_type": content_type,
+                "size": len(data),
+                "created_at": datetime.utcnow().isoformat()
+            }},
+            upsert=True
+        )
+        return avatar_id
+    except Exception as e:
+        raise Exception(f"Erreur lors de l'enregistrement de l'avatar: {str(e)}")
+
+
+async def get_avatar(db: AsyncIOMotorDatabase, avatar_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Récupérer un avatar par son identifiant.
+
+    Returns:
+        Dict ou None: {"data", "content_type"} ou None si non trouvé
+    """
+    if not AVATAR_ID_PATTERN.match(avatar_id):
+        return None
+    try:
+        return await db.avatars.find_one({"_id": avatar_id}, projection={"data": 1, "content_type": 1})
+    except Exception as e:
+        raise Exception(f"Erreur lors de la récupération de l'avatar: {str(e)}")
+
+
+async def avatar_exists(db: AsyncIOMotorDatabase, avatar_id: str) -> bool:
+    """
+    Vérifier qu'un avatar existe sans lire son contenu.
+    """
+    if not AVATAR_ID_PATTERN.match(avatar_id):
+        return False
+    try:
+        return await db.avatars.find_one({"_id": avatar_id}, projection={"_id": 1}) is not None
+    except Exception as e:
+        raise Exception(f"Erreur lors de la récupération de l'avatar: {str(e)}")
+
+
+async def migrate_inline_avatars(db: AsyncIOMotorDatabase, batch_size: int = 100, pause: float = 0.1) -> int:
+    """
+    Déplacer les avatars encore stockés en data URI dans les documents
+    utilisateurs vers la collection d'avatars, par lots. Un avatar mal
+    formé est journalisé et laissé en place ; la migration continue.
+
+    Returns:
+        int: Nombre d'utilisateurs migrés
+    """
+    migrated = 0
+    last_id = None
+    while True:
+        # Pagination par _id : les documents ignorés ne sont pas relus
+        query = {"avatar": {"$regex": "^data:"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = db.users.find(query, projection={"avatar": 1}, sort=[("_id", 1)], limit=batch_size)
+        users = await cursor.to_list(length=batch_size)
+        if not users:
+            return migrated
+        last_id = users[-1]["_id"]
+
+        for user in users:
+            header, _, encoded = user["avatar"].partition(",")
+            content_type = header[len("data:"):].split(";")[0] or "image/png"
+            try:
+                content = base64.b64decode(encoded, validate=True)
+            except (binascii.Error, ValueError) as e:
+                logger.warning("Avatar inline illisible pour %s, ignoré: %s", user["_id"], e)
+                continue
+            avatar_id = await store_avatar(db, content, content_type)
+            await db.users.update_one(
+                {"_id": user["_id"], "avatar": user["avatar"]},
+                {"$set": {"avatar": avatar_url(avatar_id)}}
+            )
+            migrated += 1
+
+        # Laisser respirer la base entre deux lots
+        await asyncio.sleep(pause)
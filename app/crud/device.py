@@ -0,0 +1,144 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timedelta, timezone
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+# Champs d'un appareil renvoyés au client (jamais la clé)
+PUBLIC_PROJECTION = {"user_id": 1, "device_id": 1, "name": 1, "created_at": 1, "last_used_at": 1, "revoked": 1}
+
+
+def device_public(device: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Représentation sérialisable d'un appareil enrôlé.
+    """
+    return {
+        "id": str(device["_id"]),
+        "device_id": device.get("device_id"),
+        "name": device.get("name"),
+        "created_at": device.get("created_at"),
+        "last_used_at": device.get("last_used_at"),
+        "revoked": device.get("revoked", False),
+    }
+
+
+async def enroll_device(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    device_id: str,
+    unlock_key: bytes,
+    name: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Enrôler (ou ré-enrôler) un appareil : la clé de déverrouillage précédente
+    de ce même appareil est remplacée et les échecs remis à zéro.
+    """
+    now = datetime.now(timezone.utc)
+    return await db.devices.find_one_and_update(
+        {"user_id": user_id, "device_id": device_id},
+        {
+            "$set": {
+                "unlock_key": unlock_key,
+                "name": name,
+                "revoked": False,
+                "failed_attempts": 0,
+                "enrolled_at": now,
+            },
+            "$setOnInsert": {"created_at": now, "last_used_at": None},
+        },
+        projection=PUBLIC_PROJECTION,
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def claim_challenge(
+    db: AsyncIOMotorDatabase,
+    device_key_id: str,
+    nonce: str,
+    ttl_seconds: int
+) -> Optional[Dict[str, Any]]:
+    """
+    Consommer un challenge puis lire la clé de l'appareil. Chaque nonce
+    consommé est enregistré jusqu'à l'expiration du challenge (index unique) :
+    un challenge ne sert qu'une fois, même après un challenge plus récent.
+    Retourne None si l'appareil est inconnu, révoqué ou si le challenge a déjà servi.
+    """
+    if not ObjectId.is_valid(device_key_id):
+        return None
+    try:
+        await db.device_challenges.insert_one({
+            "device_key_id": device_key_id,
+            "nonce": nonce,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+        })
+    except DuplicateKeyError:
+        return None
+    return await db.devices.find_one(
+        {"_id": ObjectId(device_key_id), "revoked": False},
+        projection={"user_id": 1, "unlock_key": 1, "failed_attempts": 1}
+    )
+
+
+async def record_unlock(db: AsyncIOMotorDatabase, device_key_id: str, success: bool, max_failed_attempts: int) -> None:
+    """
+    Enregistrer le résultat d'un déverrouillage. L'appareil est révoqué
+    après `max_failed_attempts` échecs consécutifs.
+    """
+    if success:
+        await db.devices.update_one(
+            {"_id": ObjectId(device_key_id)},
+            {"$set": {"failed_attempts": 0, "last_used_at": datetime.now(timezone.utc)}}
+        )
+        return
+
+    await db.devices.update_one(
+        {"_id": ObjectId(device_key_id)},
+        [{"$set": {
+            "failed_attempts": {"$add": ["$failed_attempts", 1]},
+            "revoked": {"$gte": [{"$add": ["$failed_attempts", 1]}, max_failed_attempts]},
+        }}]
+    )
+
+
+async def list_devices(db: AsyncIOMotorDatabase, user_id: str) -> List[Dict[str, Any]]:
+    """
+    Lister les appareils enrôlés d'un utilisateur.
+    """
+    cursor = db.devices.find({"user_id": user_id}, projection=PUBLIC_PROJECTION)
+    return [device_public(device) async for device in cursor]
+
+
+async def revoke_device(db: AsyncIOMotorDatabase, user_id: str, device_key_id: str) -> bool:
+    """
+    Révoquer un appareil : ses déverrouillages sont refusés jusqu'au prochain enrôlement.
+    """
+    if not ObjectId.is_valid(device_key_id):
+        return False
+    result = await db.devices.update_one(
+        {"_id": ObjectId(device_key_id), "user_id": user_id},
+        {"$set": {"revoked": True}}
+    )
+    return result.matched_count > 0
+
+
+async def revoke_user_devices(db: AsyncIOMotorDatabase, user_id: str) -> int:
+    """
+    Révoquer tous les appareils d'un utilisateur (ex: changement de PIN).
+    """
+    result = await db.devices.update_many({"user_id": user_id}, {"$set": {"revoked": True}})
+    return result.modified_count
+
+
+async def create_device_indexes(db: AsyncIOMotorDatabase):
+    """
+    Créer les index nécessaires pour la collection devices.
+    """
+    try:
+        await db.devices.create_index([("user_id", 1), ("device_id", 1)], unique=True)
+        # Challenges consommés (anti-rejeu), purgés après leur expiration
+        await db.device_challenges.create_index([("device_key_id", 1), ("nonce", 1)], unique=True)
+        await db.device_challenges.create_index("expires_at", expireAfterSeconds=0)
+    except Exception as e:
+        print(f"Erreur lors de la création des index des appareils: {str(e)}")
@@ -1,62 +1,40 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.schemas.user import UserCreate
-from passlib.context import CryptContext
 from bson import ObjectId
-from typing import Optional, Dict, Any
-from datetime import datetime
-import pymongo
-import random
-import io
-import base64
-from PIL import Image, ImageDraw, ImageFont
+from typing import Optional, Dict, Any, Type
+from datetime import datetime, timezone
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import asyncio
+import logging
+from app.models.views import V, ExistsView, LoginView, ProfileView
+from app.utils.hashing import hasher, HashingOverloadedError
+from app.utils.avatar import generate_default_avatar
+from app.crud.avatar import store_avatar, avatar_url
+from app.utils.user_cache import user_cache, invalidate_user
+from app.utils.identifiers import InvalidIdentifierError, normalize_email, normalize_identifier, normalize_phone
+from app.config import settings
 
-# Configuration du contexte de hachage
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
 
+# Collation insensible à la casse (index optionnel `mongo_email_collation`)
+EMAIL_COLLATION = {"locale": "en", "strength": 2}
 
-def generate_default_avatar(name: str) -> str:
+
+def _collation(field: str) -> Dict[str, Any]:
     """
-    Génère un avatar par défaut avec les initiales et une couleur aléatoire.
-    Lettres plus grandes et centrées.
+    Une requête n'utilise l'index à collation que si elle précise la même collation.
     """
-    colors = ["#1abc9c", "#3498db", "#9b59b6", "#e67e22", "#e74c3c", "#2ecc71", "#f1c40f"]
-    bg_color = random.choice(colors)
-    text_color = "#ffffff"
-
-    # Prendre les initiales
-    initials = "".join([word[0].upper() for word in name.split()[:2]])
-
-    # Créer l'image
-    img_size = 128
-    img = Image.new('RGB', (img_size, img_size), color=bg_color)
-    draw = ImageDraw.Draw(img)
-
-    # Utiliser une police TTF pour des lettres plus grandes
-    font_size = 64  # Ajustable selon la taille de l'image
-    try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except IOError:
-        font = ImageFont.load_default()
-
-    # Calculer la taille du texte pour le centrer
-    bbox = draw.textbbox((0, 0), initials, font=font)
-    w = bbox[2] - bbox[0]
-    h = bbox[3] - bbox[1]
-
-    # Centrer le texte
-    draw.text(((img_size - w) / 2, (img_size - h) / 2), initials, fill=text_color, font=font)
-
-    # Convertir en base64
-    buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    if field == "email" and settings.mongo_email_collation:
+        return {"collation": EMAIL_COLLATION}
+    return {}
 
 
-
-async def create_user(db: AsyncIOMotorDatabase, user: UserCreate) -> pymongo.results.InsertOneResult:
+async def create_user(db: AsyncIOMotorDatabase, user: UserCreate) -> ProfileView:
     """
     Créer un nouvel utilisateur avec mot de passe haché, avatar par défaut et timestamps.
+    Retourne le profil construit à partir du document inséré (sans relecture).
+    Lève DuplicateKeyError si l'email ou le téléphone est déjà utilisé.
     """
     try:
         # Vérifier que le mot de passe est fourni
@@ -64,17 +42,27 @@ async def create_user(db: AsyncIOMotorDatabase, user: UserCreate) -> pymongo.res
             raise ValueError("Le mot de passe est requis pour l'inscription")
 
         # Hacher le mot de passe
-        hashed_password = pwd_context.hash(user.password)
+        hashed_password = await hasher.hash(user.password)
         
         # Préparer les données utilisateur
-        user_dict = user.dict(exclude_unset=True)  # Exclut les valeurs non définies
+        user_dict = user.dict(
+            exclude_unset=True,  # Exclut les valeurs non définies
+            exclude={"email_verification_token", "phone_verification_token"}
+        )
+        # Identifiants toujours stockés sous forme canonique
+        user_dict["email"] = normalize_email(user_dict["email"])
+        user_dict["phone"] = normalize_phone(user_dict["phone"])
 
         # Nom pour avatar (par défaut "U" si vide)
         name_for_avatar = user_dict.get("name") or "U"
 
-        # Avatar par défaut si non fourni
+        # Avatar par défaut si non fourni (stocké à part, seule l'URL est dans le document)
         if not user_dict.get("avatar"):
-            user_dict["avatar"] = generate_default_avatar(name_for_avatar)
+            avatar = await generate_default_avatar(name_for_avatar)
+            if not avatar.stored:
+                await store_avatar(db, avatar.data, avatar_id=avatar.avatar_id)
+                avatar.stored = True
+            user_dict["avatar"] = avatar_url(avatar.avatar_id)
         
         # Si device_id n'est pas fourni, initialiser à None
         if 'device_id' not in user_dict:
@@ -91,10 +79,12 @@ async def create_user(db: AsyncIOMotorDatabase, user: UserCreate) -> pymongo.res
             "last_login": None
         })
         
-        # Insérer l'utilisateur dans la base
-        result = await db.users.insert_one(user_dict)
-        return result
-        
+        # Insérer l'utilisateur dans la base (insert_one renseigne user_dict["_id"])
+        await db.users.insert_one(user_dict)
+        return ProfileView.from_doc(user_dict)
+
+    except (HashingOverloadedError, DuplicateKeyError):
+        raise
     except Exception as e:
         # Journaliser l'erreur pour le debug
         import logging
@@ -104,58 +94,102 @@ async def create_user(db: AsyncIOMotorDatabase, user: UserCreate) -> pymongo.res
 
 
 
-async def get_user_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[Dict[str, Any]]:
+async def find_user(db: AsyncIOMotorDatabase, query: Dict[str, Any], view: Type[V] = ProfileView) -> Optional[V]:
+    """
+    Récupérer un utilisateur en ne lisant que les champs de la vue demandée.
+    
+    Args:
+        db: Base de données MongoDB
+        query: Filtre MongoDB
+        view: Vue à retourner (ExistsView, AuthView, ProfileView, LoginView)
+        
+    Returns:
+        Vue ou None: Utilisateur projeté ou None si non trouvé
+    """
+    user = await db.users.find_one(query, projection=view.PROJECTION)
+    return view.from_doc(user)
+
+async def get_user_cached(db: AsyncIOMotorDatabase, field: str, value: str, view: Type[V] = ProfileView) -> Optional[V]:
+    """
+    Récupérer un utilisateur par `field` ("_id", "email" ou "phone") via le cache.
+    En cas d'absence, le document est lu avec la projection de connexion
+    (la plus large) pour servir toutes les vues depuis la même entrée.
+    
+    Args:
+        db: Base de données MongoDB
+        field: Champ de recherche
+        value: Valeur recherchée (normalisée ici pour l'email et le téléphone)
+        view: Vue à retourner
+        
+    Returns:
+        Vue ou None: Utilisateur ou None si non trouvé
+    """
+    try:
+        value = normalize_identifier(field, value)
+    except InvalidIdentifierError:
+        return None
+
+    doc = user_cache.get(field, value)
+    if doc is None:
+        query = {"_id": ObjectId(value)} if field == "_id" else {field: value}
+        doc = await db.users.find_one(query, projection=LoginView.PROJECTION, **_collation(field))
+        if doc is None:
+            return None
+        user_cache.put(doc, field, value)
+    return view.from_doc(doc)
+
+async def get_user_by_email(db: AsyncIOMotorDatabase, email: str, view: Type[V] = ProfileView) -> Optional[V]:
     """
     Récupérer un utilisateur par son adresse email.
     
     Args:
         db: Base de données MongoDB
         email: Adresse email de l'utilisateur
+        view: Vue à retourner (champs lus)
         
     Returns:
-        Dict ou None: Données utilisateur ou None si non trouvé
+        Vue ou None: Données utilisateur ou None si non trouvé
     """
     try:
-        user = await db.users.find_one({"email": email.lower()})  # Email en minuscules
-        return user
+        return await get_user_cached(db, "email", email, view)
     except Exception as e:
         raise Exception(f"Erreur lors de la récupération par email: {str(e)}")
 
-async def get_user_by_phone(db: AsyncIOMotorDatabase, phone: str) -> Optional[Dict[str, Any]]:
+async def get_user_by_phone(db: AsyncIOMotorDatabase, phone: str, view: Type[V] = ProfileView) -> Optional[V]:
     """
     Récupérer un utilisateur par son numéro de téléphone.
     
     Args:
         db: Base de données MongoDB
         phone: Numéro de téléphone de l'utilisateur
+        view: Vue à retourner (champs lus)
         
     Returns:
-        Dict ou None: Données utilisateur ou None si non trouvé
+        Vue ou None: Données utilisateur ou None si non trouvé
     """
     try:
-        user = await db.users.find_one({"phone": phone})
-        return user
+        return await get_user_cached(db, "phone", phone, view)
     except Exception as e:
         raise Exception(f"Erreur lors de la récupération par téléphone: {str(e)}")
 
-async def get_user_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[Dict[str, Any]]:
+async def get_user_by_id(db: AsyncIOMotorDatabase, user_id: str, view: Type[V] = ProfileView) -> Optional[V]:
     """
     Récupérer un utilisateur par son ID.
     
     Args:
         db: Base de données MongoDB
         user_id: ID de l'utilisateur (string)
+        view: Vue à retourner (champs lus)
         
     Returns:
-        Dict ou None: Données utilisateur ou None si non trouvé
+        Vue ou None: Données utilisateur ou None si non trouvé
     """
     try:
         # Valider l'ObjectId
         if not ObjectId.is_valid(user_id):
             return None
             
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        return user
+        return await get_user_cached(db, "_id", user_id, view)
     except Exception as e:
         raise Exception(f"Erreur lors de la récupération par ID: {str(e)}")
 
@@ -182,14 +216,38 @@ async def update_user(db: AsyncIOMotorDatabase, user_id: str, update_data: Dict[
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+        await invalidate_user(user_id)
         
         return result.modified_count > 0
     except Exception as e:
         raise Exception(f"Erreur lors de la mise à jour: {str(e)}")
 
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
-from datetime import datetime
+async def update_user_pin(db: AsyncIOMotorDatabase, user_id: str, hashed_pin: str) -> Optional[ProfileView]:
+    """
+    Enregistrer le hash du PIN et retourner le profil mis à jour, en un seul aller-retour.
+    
+    Args:
+        db: Base de données MongoDB
+        user_id: ID de l'utilisateur
+        hashed_pin: Hash du PIN
+        
+    Returns:
+        ProfileView ou None: Profil mis à jour ou None si non trouvé
+    """
+    try:
+        if not ObjectId.is_valid(user_id):
+            return None
+
+        user = await db.users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"pin": hashed_pin, "pin_created_at": datetime.now(timezone.utc)}},
+            projection=ProfileView.PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        await invalidate_user(user_id)
+        return ProfileView.from_doc(user)
+    except Exception as e:
+        raise Exception(f"Erreur lors de la mise à jour du PIN: {str(e)}")
 
 async def delete_user(db: AsyncIOMotorDatabase, user_id: str) -> bool:
     """
@@ -207,6 +265,10 @@ async def delete_user(db: AsyncIOMotorDatabase, user_id: str) -> bool:
             return False
 
         result = await db.users.delete_one({"_id": ObjectId(user_id)})
+        await invalidate_user(user_id)
+        if result.deleted_count:
+            # Les appareils enrôlés ne doivent plus pouvoir déverrouiller
+            await db.devices.delete_many({"user_id": user_id})
         return result.deleted_count > 0
     except Exception as e:
         raise Exception(f"Erreur lors de la suppression: {str(e)}")
@@ -224,18 +286,28 @@ async def verify_password(hashed_password: str, plain_password: str) -> bool:
         bool: True si le mot de passe correspond, False sinon
     """
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        return await hasher.verify(plain_password, hashed_password)
+    except HashingOverloadedError:
+        raise
     except Exception:
         return False
 
-async def update_last_login(db: AsyncIOMotorDatabase, user_id: str, device_id: Optional[str] = None) -> bool:
+async def update_last_login(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    device_id: Optional[str] = None,
+    rehashed: Optional[Dict[str, str]] = None
+) -> bool:
     """
     Mettre à jour la dernière connexion de l'utilisateur.
+    L'entrée du cache est mise à jour en place ; elle n'est invalidée
+    (ici et dans les autres workers) que si un hash ou le dispositif change.
     
     Args:
         db: Base de données MongoDB
         user_id: ID de l'utilisateur
         device_id: ID du dispositif (optionnel)
+        rehashed: Nouveaux hashes du re-hachage transparent (optionnel)
         
     Returns:
         bool: True si la mise à jour a réussi, False sinon
@@ -251,11 +323,18 @@ async def update_last_login(db: AsyncIOMotorDatabase, user_id: str, device_id: O
         
         if device_id:
             update_data["device_id"] = device_id
+        if rehashed:
+            update_data.update(rehashed)
             
         result = await db.users.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": update_data}
         )
+
+        if device_id or rehashed:
+            await invalidate_user(user_id)
+        else:
+            user_cache.patch(user_id, update_data)
         
         return result.modified_count > 0
     except Exception as e:
@@ -274,12 +353,12 @@ async def check_email_exists(db: AsyncIOMotorDatabase, email: str, exclude_user_
         bool: True si l'email existe déjà, False sinon
     """
     try:
-        query = {"email": email.lower()}
+        query = {"email": normalize_email(email)}
         
         if exclude_user_id and ObjectId.is_valid(exclude_user_id):
             query["_id"] = {"$ne": ObjectId(exclude_user_id)}
             
-        user = await db.users.find_one(query)
+        user = await db.users.find_one(query, projection=ExistsView.PROJECTION, **_collation("email"))
         return user is not None
     except Exception as e:
         raise Exception(f"Erreur lors de la vérification d'email: {str(e)}")
@@ -297,12 +376,12 @@ async def check_phone_exists(db: AsyncIOMotorDatabase, phone: str, exclude_user_
         bool: True si le téléphone existe déjà, False sinon
     """
     try:
-        query = {"phone": phone}
+        query = {"phone": normalize_phone(phone)}
         
         if exclude_user_id and ObjectId.is_valid(exclude_user_id):
             query["_id"] = {"$ne": ObjectId(exclude_user_id)}
             
-        user = await db.users.find_one(query)
+        user = await db.users.find_one(query, projection=ExistsView.PROJECTION)
         return user is not None
     except Exception as e:
         raise Exception(f"Erreur lors de la vérification de téléphone: {str(e)}")
@@ -315,8 +394,68 @@ async def create_indexes(db: AsyncIOMotorDatabase):
     try:
         await db.users.create_index("email", unique=True)
         await db.users.create_index("phone", unique=True)
+        if settings.mongo_email_collation:
+            await db.users.create_index("email", unique=True, collation=EMAIL_COLLATION, name="email_ci")
         await db.users.create_index("device_id")
         await db.users.create_index("is_active")
         await db.users.create_index("created_at")
     except Exception as e:
-        print(f"Erreur lors de la création des index: {str(e)}")
\ No newline at end of file
+        print(f"Erreur lors de la création des index: {str(e)}")
+
+async def normalize_existing_identifiers(db: AsyncIOMotorDatabase, batch_size: int = 500, pause: float = 0.1) -> Dict[str, int]:
+    """
+    Remettre sous forme canonique les emails et téléphones déjà stockés,
+    par lots (parcours par _id croissant, sans bloquer la collection).
+    Les documents qui entreraient en conflit avec un compte existant
+    ne sont pas modifiés et sont journalisés pour traitement manuel.
+
+    Returns:
+        Dict: {"scanned", "updated", "conflicts", "invalid"}
+    """
+    stats = {"scanned": 0, "updated": 0, "conflicts": 0, "invalid": 0}
+    last_id = None
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        cursor = db.users.find(query, projection={"email": 1, "phone": 1}).sort("_id", 1).limit(batch_size)
+        users = await cursor.to_list(length=batch_size)
+        if not users:
+            return stats
+
+        operations = []
+        changed_ids = []
+        for user in users:
+            stats["scanned"] += 1
+            changes = {}
+            try:
+                for field, normalize in (("email", normalize_email), ("phone", normalize_phone)):
+                    if user.get(field):
+                        canonical = normalize(user[field])
+                        if canonical != user[field]:
+                            changes[field] = canonical
+            except InvalidIdentifierError as e:
+                stats["invalid"] += 1
+                logger.warning("Identifiant non normalisable pour %s: %s", user["_id"], e)
+                continue
+            if changes:
+                # Filtre sur les anciennes valeurs : une écriture concurrente gagne
+                operations.append(UpdateOne(
+                    {"_id": user["_id"], **{field: user[field] for field in changes}},
+                    {"$set": changes}
+                ))
+                changed_ids.append(str(user["_id"]))
+
+        if operations:
+            try:
+                result = await db.users.bulk_write(operations, ordered=False)
+                stats["updated"] += result.modified_count
+            except BulkWriteError as e:
+                stats["updated"] += e.details.get("nModified", 0)
+                for error in e.details.get("writeErrors", []):
+                    stats["conflicts"] += 1
+                    logger.warning("Conflit de normalisation: %s", error.get("errmsg"))
+            for user_id in changed_ids:
+                await invalidate_user(user_id)
+
+        last_id = users[-1]["_id"]
+        # Laisser respirer la base entre deux lots
+        await asyncio.sleep(pause)
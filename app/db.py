@@ -0,0 +1,191 @@
+# app/db.py
+
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+from app.config import settings
+from app.utils.metrics import span
+from app.utils.mongo_monitor import CommandMonitor
+
+logger = logging.getLogger(__name__)
+
+# Méthodes de collection qui font un aller-retour vers MongoDB
+ROUND_TRIP_METHODS = {
+    "find_one",
+    "find_one_and_update",
+    "find_one_and_replace",
+    "find_one_and_delete",
+    "insert_one",
+    "insert_many",
+    "update_one",
+    "update_many",
+    "replace_one",
+    "delete_one",
+    "delete_many",
+    "count_documents",
+    "create_index",
+    "bulk_write",
+}
+
+
+@dataclass
+class OpCounter:
+    """
+    Opérations MongoDB effectuées pendant une requête HTTP.
+    """
+    ops: List[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.ops)
+
+
+_current_ops: ContextVar[Optional[OpCounter]] = ContextVar("mongo_ops", default=None)
+
+
+def record_op(name: str) -> None:
+    counter = _current_ops.get()
+    if counter is not None:
+        counter.ops.append(name)
+
+
+class InstrumentedCollection:
+    """
+    Enveloppe d'une collection Motor qui compte les allers-retours de la requête en cours.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection):
+        self._collection = collection
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._collection, name)
+        op_name = f"{self._collection.name}.{name}"
+
+        if name in ROUND_TRIP_METHODS:
+            async def counted(*args, **kwargs):
+                record_op(op_name)
+                with span("mongo", op_name):
+                    return await attr(*args, **kwargs)
+            return counted
+
+        if name in ("find", "aggregate"):
+            # Curseur : compté une fois à la création
+            def counted_cursor(*args, **kwargs):
+                record_op(op_name)
+                return attr(*args, **kwargs)
+            return counted_cursor
+
+        return attr
+
+
+class InstrumentedDatabase:
+    """
+    Enveloppe d'une base Motor dont les collections sont instrumentées.
+    """
+
+    def __init__(self, database: AsyncIOMotorDatabase):
+        self._database = database
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        return InstrumentedCollection(self._database[name])
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._database, name)
+        if isinstance(attr, AsyncIOMotorCollection):
+            return InstrumentedCollection(attr)
+        if name == "command":
+            async def counted(*args, **kwargs):
+                record_op(f"{self._database.name}.command")
+                with span("mongo", "command"):
+                    return await attr(*args, **kwargs)
+            return counted
+        return attr
+
+
+# Suivi des commandes (formes de requête, requêtes lentes, explain optionnel)
+command_monitor = CommandMonitor(
+    slow_ms=settings.mongo_slow_query_ms,
+    explain=settings.mongo_explain_new_shapes,
+)
+
+# Connexion à MongoDB (les connexions sont ouvertes à la première opération)
+client = AsyncIOMotorClient(
+    settings.mongo_uri,
+    maxPoolSize=settings.mongo_max_pool_size,
+    minPoolSize=settings.mongo_min_pool_size,
+    maxIdleTimeMS=settings.mongo_max_idle_time_ms,
+    compressors=settings.mongo_compressors,
+    connectTimeoutMS=settings.mongo_connect_timeout_ms,
+    serverSelectionTimeoutMS=settings.mongo_server_selection_timeout_ms,
+    socketTimeoutMS=settings.mongo_socket_timeout_ms,
+    event_listeners=[command_monitor] if settings.mongo_monitoring else [],
+)
+raw_db = client[settings.database_name]  # Non instrumentée (tâches de fond)
+db = InstrumentedDatabase(raw_db)
+
+
+# Dépendance pour récupérer la DB
+async def get_db() -> AsyncIOMotorDatabase:
+    return db
+
+
+def mongo_budget(max_ops: int) -> Callable:
+    """
+    Déclarer le nombre maximal d'allers-retours MongoDB d'un endpoint.
+    À placer sous le décorateur de route.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__mongo_budget__ = max_ops
+        return endpoint
+    return decorator
+
+
+class MongoBudgetExceeded(AssertionError):
+    pass
+
+
+class MongoOpBudgetMiddleware:
+    """
+    Compte les opérations MongoDB de chaque requête, les expose dans l'en-tête
+    `X-Mongo-Ops` et signale les endpoints qui dépassent leur budget
+    (`mongo_op_budget_mode` : "off", "log" ou "raise").
+    """
+
+    def __init__(self, app, mode: str = "log"):
+        self.app = app
+        self.mode = mode
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        counter = OpCounter()
+        token = _current_ops.set(counter)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-mongo-ops", str(counter.count).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            _current_ops.reset(token)
+
+        # Le routeur renseigne l'endpoint dans le scope partagé
+        budget = getattr(scope.get("endpoint"), "__mongo_budget__", None)
+        if budget is not None and counter.count > budget:
+            message = (
+                f"{scope.get('path')}: {counter.count} opérations MongoDB "
+                f"(budget {budget}): {', '.join(counter.ops)}"
+            )
+            if self.mode == "raise":
+                raise MongoBudgetExceeded(message)
+            logger.warning(message)
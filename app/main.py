@@ -1,8 +1,92 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth
+from fastapi.responses import PlainTextResponse
+from app.routes import auth, avatars, devices, jwks
+from app.config import settings
+from app.db import client, command_monitor, db, MongoOpBudgetMiddleware
+from app.crud.user import create_indexes
+from app.crud.device import create_device_indexes
+from app.utils.hashing import hasher
+from app.utils.email import smtp_pool, smtp_fallback_pool
+from app.utils.whatsapp import whatsapp_client
+from app.utils.notifications import notifications
+from app.utils.avatar import avatar_cache, AVATAR_COLORS
+from app.utils.user_cache import user_cache, invalidation_channel
+from app.utils.current_user import revocation_list
+from app.utils.metrics import MetricsMiddleware, registry
+from app.utils.admission import gates
 
-app = FastAPI(title="Visa Carte Backend")
+logger = logging.getLogger(__name__)
+
+# --- Cycle de vie ---
+async def warm_up() -> None:
+    """
+    Préchauffer ce que la première requête paierait sinon : connexions
+    MongoDB, workers de hachage, PIL et police, connexions sortantes.
+    Un échec est journalisé sans empêcher le démarrage.
+    """
+    steps = {
+        "mongo": client.admin.command("ping"),
+        "hashing": hasher.warm_up(),
+        "avatar": avatar_cache.get(AVATAR_COLORS[0], "A"),
+        "smtp": smtp_pool.warm_up(),
+        "whatsapp": whatsapp_client.warm_up(),
+    }
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("Préchauffage %s échoué: %s", name, result)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    command_monitor.attach(client, asyncio.get_running_loop())
+
+    # Les index uniques email/téléphone protègent /final-register
+    await create_indexes(db)
+    await create_device_indexes(db)
+    await auth.verification_store.ensure_indexes()
+    await revocation_list.ensure_indexes()
+    if auth.rate_limiter is not None:
+        await auth.rate_limiter.ensure_indexes()
+
+    if settings.hash_calibrate:
+        await hasher.calibrate(
+            settings.hash_target_ms,
+            min_rounds=settings.hash_bcrypt_min_rounds,
+            max_rounds=settings.hash_bcrypt_max_rounds,
+        )
+    if settings.warmup_enabled:
+        await warm_up()
+
+    await revocation_list.start()
+    await notifications.start()
+    await invalidation_channel.start()
+
+    # Pré-rendu des avatars en arrière-plan (ne bloque pas le démarrage)
+    prerender = asyncio.create_task(avatar_cache.prerender()) if settings.avatar_prerender else None
+
+    yield
+
+    # Arrêt : le serveur a fini les requêtes en cours ; on vide la file
+    # d'envoi avant de fermer les connexions sortantes
+    if prerender is not None:
+        prerender.cancel()
+    await notifications.stop(timeout=settings.shutdown_drain_seconds)
+    await invalidation_channel.stop()
+    await revocation_list.stop()
+    await smtp_pool.close()
+    if smtp_fallback_pool is not None:
+        await smtp_fallback_pool.close()
+    await whatsapp_client.close()
+    hasher.shutdown()
+    client.close()
+
+
+app = FastAPI(title="Visa Carte Backend", lifespan=lifespan)
 
 # --- CORS Middleware ---
 origins = [
@@ -17,9 +101,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Budget d'opérations MongoDB par requête ---
+app.add_middleware(MongoOpBudgetMiddleware, mode=settings.mongo_op_budget_mode)
+
+# --- Métriques (ajouté en dernier : mesure toute la pile) ---
+app.add_middleware(MetricsMiddleware)
+
 # --- Routes ---
 app.include_router(auth.router)
+app.include_router(devices.router)
+app.include_router(avatars.router)
+app.include_router(jwks.router)
 
 @app.get("/")
 async def root():
     return {"message": "Bienvenue sur le backend Visa Carte!"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Format d'exposition texte de Prometheus
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/user-cache")
+async def user_cache_stats():
+    return user_cache.stats()
+
+@app.get("/stats/mongo")
+async def mongo_stats():
+    return command_monitor.stats()
+
+@app.get("/stats/admission")
+async def admission_stats():
+    return {name: gate.stats() for name, gate in gates.items()}
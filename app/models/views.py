@@ -0,0 +1,80 @@
+from typing import Any, ClassVar, Dict, Optional, Type, TypeVar
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+
+V = TypeVar("V", bound="UserView")
+
+
+class UserView(BaseModel):
+    """
+    Vue partielle d'un document utilisateur.
+    La projection MongoDB est dérivée des champs déclarés : chaque requête
+    ne lit que ce que la vue utilise.
+    """
+
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
+
+    PROJECTION: ClassVar[Dict[str, int]] = {"_id": 1}
+
+    id: str = Field(alias="_id")
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        cls.PROJECTION = {(field.alias or name): 1 for name, field in cls.model_fields.items()}
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def object_id_to_str(cls, value: Any) -> str:
+        return str(value)
+
+    @classmethod
+    def from_doc(cls: Type[V], doc: Optional[Dict[str, Any]]) -> Optional[V]:
+        if not doc:
+            return None
+        return cls.model_validate(doc)
+
+
+class ExistsView(UserView):
+    """
+    Uniquement l'_id (tests d'existence).
+    """
+
+
+class AuthView(UserView):
+    """
+    _id et hashes du mot de passe et du PIN.
+    """
+
+    password: Optional[str] = None
+    pin: Optional[str] = None
+
+
+class ProfileView(UserView):
+    """
+    Champs publics du profil.
+    """
+
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    name: Optional[str] = None
+    avatar: Optional[str] = None
+    balance: float = 0.0
+    device_id: Optional[str] = None
+    is_active: bool = True
+    is_verified: bool = False
+    created_at: Optional[Any] = None
+    updated_at: Optional[Any] = None
+    last_login: Optional[Any] = None
+
+    def public(self) -> Dict[str, Any]:
+        """
+        Profil sérialisable, avec l'_id en chaîne.
+        """
+        return self.model_dump(by_alias=True)
+
+
+class LoginView(AuthView, ProfileView):
+    """
+    Profil + hashes (connexion).
+    """
@@ -1,14 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
-from random import randint
-from pydantic import BaseModel, EmailStr
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from passlib.context import CryptContext
-from app.utils.email import send_verification_email
-from app.utils.whatsapp import send_whatsapp_code
-from app.schemas.user import UserCreate, UserResponse, LoginRequest
-from app.crud.user import create_user, get_user_by_email, get_user_by_phone, delete_user
+import math
+from fastapi import APIRouter, HTTPException, Depends, Request
+from pydantic import BaseModel
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from app.db import db, raw_db, get_db, mongo_budget
+from app.utils.whatsapp import generate_code
+from app.utils.notifications import notifications, NotificationQueueFullError
+from app.utils.code_issuer import CodeIssuer, IssuedCode
+from app.schemas.user import UserCreate, UserResponse, LoginRequest, NormalizedEmail, NormalizedPhone
+from app.crud.user import (
+    create_user,
+    get_user_cached,
+    get_user_by_id,
+    check_email_exists,
+    delete_user,
+    update_last_login,
+)
+from app.models.views import AuthView, ProfileView, LoginView
 from app.config import settings
-from app.utils.pin import set_user_pin, verify_user_pin, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.utils.pin import (
+    set_user_pin,
+    verify_user_pin,
+    create_access_token,
+    create_verification_proof,
+    verify_verification_proof,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+)
+from app.utils.hashing import hasher, HashingOverloadedError
+from app.utils.verification import CheckResult, create_verification_store
+from app.utils.current_user import CurrentUser, get_current_user, revocation_list
+from app.crud.device import revoke_user_devices
+from app.utils.rate_limit import client_ip, create_rate_limiter
+from app.utils.admission import admission
 from typing import Optional
 from bson import ObjectId
 from datetime import datetime, timedelta, timezone
@@ -16,32 +39,33 @@ from datetime import datetime, timedelta, timezone
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-# Configuration du hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Stockage des codes de vérification (avec expiration)
+verification_store = create_verification_store(db)
 
-# Connexion à MongoDB
-client = AsyncIOMotorClient(settings.mongo_uri)
-db = client[settings.database_name]
+# Émission des codes : un seul envoi concurrent par destinataire + cooldown
+code_issuer = CodeIssuer(
+    verification_store,
+    notifications,
+    generate=generate_code,
+    cooldown=settings.verification_resend_cooldown_seconds,
+)
 
-# Stockage temporaire des codes et états de vérification
-email_codes = {}
-phone_codes = {}
-verified_emails = set()  # Emails vérifiés
-verified_phones = set()  # Téléphones vérifiés
+# Limitation des tentatives par IP, appareil et compte (None si désactivée)
+rate_limiter = create_rate_limiter(raw_db)
 
 # --- Schémas pour les requêtes intermédiaires ---
 class EmailVerificationRequest(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
 
 class VerifyEmailCodeRequest(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
     code: str
 
 class PhoneVerificationRequest(BaseModel):
-    phone: str
+    phone: NormalizedPhone
 
 class VerifyPhoneCodeRequest(BaseModel):
-    phone: str
+    phone: NormalizedPhone
     code: str
 
 # Schéma pour les données PIN
@@ -51,15 +75,67 @@ class PinData(BaseModel):
 
 # Schéma de connexion enrichi
 class LoginRequest(BaseModel):
-    email: Optional[EmailStr] = None
-    phone: Optional[str] = None
+    email: Optional[NormalizedEmail] = None
+    phone: Optional[NormalizedPhone] = None
     password: Optional[str] = None
     pin: Optional[str] = None
     device_id: Optional[str] = None
 
-# Dépendance pour récupérer la DB
-async def get_db() -> AsyncIOMotorDatabase:
-    return db
+# Réponse rapide quand le pool de hachage est saturé
+def hashing_overloaded() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Serveur surchargé, veuillez réessayer",
+        headers={"Retry-After": "1"}
+    )
+
+# Refus à bas coût des tentatives en excès, avant toute lecture ou hachage
+async def throttle(http_request: Request, account: Optional[str], device_id: Optional[str] = None) -> None:
+    if rate_limiter is None:
+        return
+    retry_after = await rate_limiter.hit(
+        ip=client_ip(http_request, settings.rate_limit_trusted_proxy_hops),
+        device=device_id,
+        account=account,
+    )
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de tentatives, veuillez réessayer plus tard",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+# Dépendances de limitation, à placer avant admission(...) : un client refusé
+# ici n'occupe ni place ni file d'attente dans la classe d'endpoints
+async def throttle_login(request: LoginRequest, http_request: Request) -> None:
+    await throttle(http_request, request.email or request.phone, request.device_id)
+
+async def throttle_pin(data: PinData, http_request: Request) -> None:
+    await throttle(http_request, data.user_id)
+
+async def throttle_change_pin(old_pin_data: dict, http_request: Request) -> None:
+    await throttle(http_request, old_pin_data.get("user_id"))
+
+# Réponse commune des endpoints d'envoi de code
+def code_sent_response(issued: IssuedCode, message: str) -> dict:
+    if not issued.sent:
+        message = "Un code a déjà été envoyé récemment, veuillez patienter avant d'en demander un nouveau"
+    return {
+        "success": True,
+        "message": message,
+        "notification_id": issued.notification_id,
+        "retry_after": issued.retry_after
+    }
+
+# Traduction du résultat de vérification d'un code en erreur HTTP
+def code_check_error(result: CheckResult, missing_detail: str, invalid_detail: str) -> HTTPException:
+    if result == CheckResult.MISSING:
+        return HTTPException(status_code=400, detail=missing_detail)
+    if result == CheckResult.EXPIRED:
+        return HTTPException(status_code=400, detail="Le code de vérification a expiré")
+    if result == CheckResult.TOO_MANY_ATTEMPTS:
+        return HTTPException(status_code=429, detail="Trop de tentatives, veuillez demander un nouveau code")
+    return HTTPException(status_code=400, detail=invalid_detail)
 
 # Fonction helper pour valider ObjectId
 def is_valid_object_id(user_id: str) -> bool:
@@ -71,31 +147,26 @@ def is_valid_object_id(user_id: str) -> bool:
 
 # --- Étape 1: Envoi code email ---
 @router.post("/send-email-code")
+@mongo_budget(3)
 async def send_email_code(request: EmailVerificationRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     try:
         email = request.email
 
         # Vérifier si l'email existe déjà
-        existing_user = await get_user_by_email(db, email)
-        if existing_user:
+        if await check_email_exists(db, email):
             raise HTTPException(
                 status_code=400,
                 detail="Cette adresse email est déjà utilisée"
             )
 
-        # Génération du code
-        code = f"{randint(100000, 999999)}"
-        email_codes[email] = code
-
-        # Envoi du mail
-        await send_verification_email(email=email, code=code)
-        return {
-            "success": True,
-            "message": f"Code de vérification envoyé à {email}"
-        }
+        # Génération du code et envoi du mail en arrière-plan
+        issued = await code_issuer.issue("email", "email", email)
+        return code_sent_response(issued, f"Code de vérification envoyé à {email}")
 
     except HTTPException:
         raise
+    except NotificationQueueFullError:
+        raise HTTPException(status_code=503, detail="Service d'envoi saturé, veuillez réessayer", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -110,25 +181,20 @@ async def verify_email_code(request: VerifyEmailCodeRequest):
         email = request.email
         code = request.code
 
-        # Vérifier si le code existe et est correct
-        if email not in email_codes:
-            raise HTTPException(
-                status_code=400,
-                detail="Aucun code n'a été envoyé pour cette adresse email"
+        # Vérifier si le code existe, n'a pas expiré et est correct (le code est consommé)
+        result = await verification_store.check_code("email", email, code)
+        if result != CheckResult.OK:
+            raise code_check_error(
+                result,
+                missing_detail="Aucun code n'a été envoyé pour cette adresse email",
+                invalid_detail="Le code de vérification est incorrect"
             )
 
-        if email_codes[email] != code:
-            raise HTTPException(
-                status_code=400,
-                detail="Le code de vérification est incorrect"
-            )
-
-        # Marquer l'email comme vérifié et supprimer le code
-        verified_emails.add(email)
-        del email_codes[email]
+        # Preuve signée de vérification, à fournir à /final-register
         return {
             "success": True,
-            "message": "Adresse email vérifiée avec succès"
+            "message": "Adresse email vérifiée avec succès",
+            "verification_token": create_verification_proof("email", email)
         }
 
     except HTTPException:
@@ -144,19 +210,27 @@ async def verify_email_code(request: VerifyEmailCodeRequest):
 async def send_phone_code(request: PhoneVerificationRequest):
     try:
         phone = request.phone
-        code = await send_whatsapp_code(phone)
-        phone_codes[phone] = code
-        return {
-            "success": True,
-            "message": f"Code envoyé à {phone} via WhatsApp"
-        }
 
+        # Génération du code et envoi WhatsApp en arrière-plan
+        issued = await code_issuer.issue("phone", "whatsapp", phone)
+        return code_sent_response(issued, f"Code envoyé à {phone} via WhatsApp")
+
+    except NotificationQueueFullError:
+        raise HTTPException(status_code=503, detail="Service d'envoi saturé, veuillez réessayer", headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail="Erreur lors de l'envoi du code WhatsApp"
         )
 
+# --- Suivi de l'envoi d'un code ---
+@router.get("/notifications/{notification_id}")
+async def notification_status(notification_id: str):
+    notification = await notifications.status(notification_id)
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification introuvable")
+    return notification.to_dict()
+
 # --- Étape 4: Vérification code téléphone ---
 @router.post("/verify-phone-code")
 async def verify_phone_code(request: VerifyPhoneCodeRequest):
@@ -164,23 +238,18 @@ async def verify_phone_code(request: VerifyPhoneCodeRequest):
         phone = request.phone
         code = request.code
 
-        if phone not in phone_codes:
-            raise HTTPException(
-                status_code=400,
-                detail="Aucun code n'a été envoyé pour ce numéro"
+        result = await verification_store.check_code("phone", phone, code)
+        if result != CheckResult.OK:
+            raise code_check_error(
+                result,
+                missing_detail="Aucun code n'a été envoyé pour ce numéro",
+                invalid_detail="Le code de vérification WhatsApp est incorrect"
             )
 
-        if phone_codes[phone] != code:
-            raise HTTPException(
-                status_code=400,
-                detail="Le code de vérification WhatsApp est incorrect"
-            )
-
-        verified_phones.add(phone)
-        del phone_codes[phone]
         return {
             "success": True,
-            "message": "Numéro de téléphone vérifié avec succès"
+            "message": "Numéro de téléphone vérifié avec succès",
+            "verification_token": create_verification_proof("phone", phone)
         }
 
     except HTTPException:
@@ -193,65 +262,52 @@ async def verify_phone_code(request: VerifyPhoneCodeRequest):
 
 
 # --- Étape 5: Création utilisateur final ---
-@router.post("/final-register")
+@router.post("/final-register", dependencies=[Depends(admission("register"))])
+@mongo_budget(2)
 async def final_register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Inscription finale : Crée un utilisateur et retourne toutes ses infos.
     """
     try:
-        # Vérifier email vérifié
-        if user.email not in verified_emails:
+        # Vérifier les preuves de vérification (validées localement, sans état partagé)
+        if not verify_verification_proof(user.email_verification_token, "email", user.email):
             raise HTTPException(
                 status_code=400,
                 detail="L'adresse email n'a pas été vérifiée"
             )
 
-        # Vérifier téléphone vérifié
-        if user.phone not in verified_phones:
+        if not verify_verification_proof(user.phone_verification_token, "phone", user.phone):
             raise HTTPException(
                 status_code=400,
                 detail="Le numéro de téléphone n'a pas été vérifié"
             )
 
-        # Vérifier si email existe déjà
-        existing_user = await get_user_by_email(db, user.email)
-        if existing_user:
+        # Créer l'utilisateur : les index uniques refusent un email ou téléphone
+        # déjà utilisé, et le profil est construit sans relire le document
+        try:
+            created_user = await create_user(db, user)
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get("keyPattern", {})
             raise HTTPException(
                 status_code=400,
-                detail="Cette adresse email est déjà utilisée"
+                detail="Ce numéro de téléphone est déjà utilisé" if "phone" in key_pattern
+                else "Cette adresse email est déjà utilisée"
             )
 
-        # Créer l'utilisateur
-        result = await create_user(db, user)
-        user_id = result.inserted_id
-
-        # 🔥 Récupérer et afficher toutes les infos
-        created_user = await db.users.find_one({"_id": user_id})
-        if not created_user:
-            raise HTTPException(
-                status_code=500,
-                detail="Utilisateur non trouvé après création"
-            )
-
-        # Convertir ObjectId en str
-        created_user["_id"] = str(created_user["_id"])
-
         # 🔥 Debug complet dans la console
         # print("[DEBUG] Nouvel utilisateur créé :", created_user)
 
-        # Nettoyage des vérifications
-        verified_emails.discard(user.email)
-        verified_phones.discard(user.phone)
-
         # Retour complet
         return {
             "success": True,
             "message": "Compte créé avec succès",
-            "user": created_user
+            "user": created_user.public()
         }
 
     except HTTPException:
         raise
+    except HashingOverloadedError:
+        raise hashing_overloaded()
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -260,7 +316,8 @@ async def final_register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(ge
 
 
 # --- Gestion du PIN améliorée avec token ---
-@router.post("/set-pin")
+@router.post("/set-pin", dependencies=[Depends(admission("pin"))])
+@mongo_budget(2)
 async def create_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Définir le code PIN pour un utilisateur et retourner le token JWT.
@@ -275,25 +332,22 @@ async def create_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
         if not data.pin.isdigit() or not (4 <= len(data.pin) <= 6):
             raise HTTPException(status_code=400, detail="Le PIN doit contenir entre 4 et 6 chiffres")
 
-        # Vérifier que l'utilisateur existe
-        user = await db.users.find_one({"_id": ObjectId(data.user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="Utilisateur introuvable")
-
-        # Définir le PIN et générer le token
-        access_token = await set_user_pin(db, data.user_id, data.pin)
+        # Définir le PIN et générer le token (404 si l'utilisateur n'existe pas)
+        access_token, user = await set_user_pin(db, data.user_id, data.pin)
+        # Les clés de déverrouillage des appareils dérivent de l'ancien PIN
+        await revoke_user_devices(db, data.user_id)
 
         # Préparer le profil utilisateur pour le retour
         user_profile = {
-            "_id": str(user["_id"]),
-            "name": user.get("name"),
-            "email": user.get("email"),
-            "avatar": user.get("avatar"), 
-            "balance": user.get("balance", 0.0),
-            "phone": user.get("phone"),
-            "is_active": user.get("is_active", True),
-            "created_at": user.get("created_at"),
-            "updated_at": user.get("updated_at"),
+            "_id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "avatar": user.avatar,
+            "balance": user.balance,
+            "phone": user.phone,
+            "is_active": user.is_active,
+            "created_at": user.created_at,
+            "updated_at": user.updated_at,
         }
 
         return {
@@ -306,10 +360,12 @@ async def create_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
 
     except HTTPException:
         raise
+    except HashingOverloadedError:
+        raise hashing_overloaded()
     except Exception as e:
         # Suppression de l'utilisateur si une erreur survient
         try:
-            await db.users.delete_one({"_id": ObjectId(data.user_id)})
+            await delete_user(db, data.user_id)
             print(f"[DEBUG] Utilisateur {data.user_id} supprimé après échec du PIN")
         except Exception as delete_err:
             print(f"[ERROR] Impossible de supprimer l'utilisateur après échec: {delete_err}")
@@ -321,7 +377,8 @@ async def create_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
 
 
 
-@router.post("/verify-pin")
+@router.post("/verify-pin", dependencies=[Depends(throttle_pin), Depends(admission("login"))])
+@mongo_budget(2)
 async def check_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Vérifier le code PIN d'un utilisateur.
@@ -334,15 +391,15 @@ async def check_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
                 detail="ID utilisateur invalide"
             )
         
-        # Vérifier que l'utilisateur existe
-        user = await db.users.find_one({"_id": ObjectId(data.user_id)})
+        # Vérifier que l'utilisateur existe (les hashes sont lus dans la même requête)
+        user = await get_user_by_id(db, data.user_id, AuthView)
         if not user:
             raise HTTPException(
                 status_code=404,
                 detail="Utilisateur introuvable"
             )
         
-        is_valid = await verify_user_pin(db, data.user_id, data.pin)
+        is_valid = await verify_user_pin(db, data.user_id, data.pin, user=user)
         if not is_valid:
             raise HTTPException(
                 status_code=400,
@@ -356,13 +413,16 @@ async def check_pin(data: PinData, db: AsyncIOMotorDatabase = Depends(get_db)):
         }
     except HTTPException:
         raise
+    except HashingOverloadedError:
+        raise hashing_overloaded()
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Erreur lors de la vérification du PIN: {str(e)}"
         )
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(throttle_login), Depends(admission("login"))])
+@mongo_budget(2)
 async def login(request: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
     """
     Login utilisateur par mot de passe ou PIN.
@@ -373,43 +433,51 @@ async def login(request: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db
 
         # Vérification email ou téléphone
         if request.email:
-            user = await db.users.find_one({"email": request.email})
+            user = await get_user_cached(db, "email", request.email, LoginView)
         elif request.phone:
-            user = await db.users.find_one({"phone": request.phone})
+            user = await get_user_cached(db, "phone", request.phone, LoginView)
         else:
             raise HTTPException(status_code=400, detail="Email ou téléphone requis")
 
         if not user:
             raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
 
+        rehashed = {}
+
         # Vérification par mot de passe
         if request.password:
-            if not pwd_context.verify(request.password, user["password"]):
+            is_valid, new_hash = await hasher.verify_and_update(request.password, user.password)
+            if not is_valid:
                 raise HTTPException(status_code=401, detail="Mot de passe incorrect")
+            if new_hash:
+                rehashed["password"] = new_hash
 
         # Vérification par PIN
         elif request.pin:
-            if not user.get("pin"):
+            if not user.pin:
                 raise HTTPException(status_code=400, detail="Aucun PIN défini pour cet utilisateur")
 
-            if not pwd_context.verify(request.pin, user["pin"]):
+            is_valid, new_hash = await hasher.verify_and_update(request.pin, user.pin)
+            if not is_valid:
                 raise HTTPException(status_code=401, detail="PIN incorrect")
+            if new_hash:
+                rehashed["pin"] = new_hash
 
         else:
             raise HTTPException(status_code=400, detail="Mot de passe ou PIN requis")
 
-        # Mise à jour du last_login
-        await db.users.update_one(
-            {"_id": user["_id"]},
-            {"$set": {"last_login": datetime.utcnow()}}
-        )
+        # Mise à jour du last_login (et re-hachage transparent si nécessaire),
+        # en une seule écriture
+        # Le dispositif n'est réécrit que s'il change
+        device_id = request.device_id if request.device_id != user.device_id else None
+        await update_last_login(db, user.id, device_id=device_id, rehashed=rehashed)
 
         # Génération du token JWT avec user_id + email + phone
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            user_id=str(user["_id"]),
-            email=user.get("email"),
-            phone=user.get("phone"),
+            user_id=user.id,
+            email=user.email,
+            phone=user.phone,
             expires_delta=access_token_expires,
         )
 
@@ -419,22 +487,24 @@ async def login(request: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db
             "token_type": "bearer",
             "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,  # en secondes
             "user": {
-                "id": str(user["_id"]),
-                "email": user.get("email"),
-                "phone": user.get("phone"),
-                "name": user.get("name"),
-                "avatar": user.get("avatar"),
-                "device_id": user.get("device_id"),
-                "is_active": user.get("is_active", False),
-                "is_verified": user.get("is_verified", False),
-                "created_at": user.get("created_at"),
-                "updated_at": user.get("updated_at"),
+                "id": user.id,
+                "email": user.email,
+                "phone": user.phone,
+                "name": user.name,
+                "avatar": user.avatar,
+                "device_id": request.device_id or user.device_id,
+                "is_active": user.is_active,
+                "is_verified": user.is_verified,
+                "created_at": user.created_at,
+                "updated_at": user.updated_at,
                 "last_login": datetime.utcnow().isoformat()
             }
         }
 
     except HTTPException:
         raise
+    except HashingOverloadedError:
+        raise hashing_overloaded()
     except Exception as e:
         import traceback
         print("Erreur login:", e)
@@ -443,7 +513,7 @@ async def login(request: LoginRequest, db: AsyncIOMotorDatabase = Depends(get_db
 
 
 # --- Endpoint pour changer le PIN ---
-@router.post("/change-pin")
+@router.post("/change-pin", dependencies=[Depends(throttle_change_pin), Depends(admission("login"))])
 async def change_pin(
     old_pin_data: dict, 
     new_pin: str, 
@@ -477,8 +547,9 @@ async def change_pin(
                 detail="Le nouveau PIN doit contenir entre 4 et 6 chiffres"
             )
         
-        # Définir le nouveau PIN
+        # Définir le nouveau PIN ; les clés de déverrouillage dérivent de l'ancien
         await set_user_pin(db, user_id, new_pin)
+        await revoke_user_devices(db, user_id)
         
         return {
             "success": True,
@@ -487,6 +558,8 @@ async def change_pin(
         
     except HTTPException:
         raise
+    except HashingOverloadedError:
+        raise hashing_overloaded()
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -503,4 +576,26 @@ async def delete_user_route(user_id: str, db: AsyncIOMotorDatabase = Depends(get
     success = await delete_user(db, user_id)
     if not success:
         raise HTTPException(status_code=400, detail="Suppression échouée ou utilisateur introuvable")
-    return {"success": True, "message": "Utilisateur supprimé avec succès"}
\ No newline at end of file
+    return {"success": True, "message": "Utilisateur supprimé avec succès"}
+
+@router.get("/me")
+@mongo_budget(1)
+async def me(current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Profil de l'utilisateur authentifié.
+    """
+    user = await current_user.load(ProfileView)
+    return {"success": True, "user": user.public()}
+
+
+@router.post("/logout")
+@mongo_budget(1)
+async def logout(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Révoquer le token utilisé pour cette requête.
+    """
+    await revocation_list.revoke(db, current_user.claims)
+    return {"success": True, "message": "Déconnexion réussie"}
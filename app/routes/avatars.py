@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.crud.avatar import avatar_exists, get_avatar
+from app.db import get_db
+
+router = APIRouter(prefix="/avatars", tags=["avatars"])
+
+# Les avatars sont adressés par contenu : ils ne changent jamais
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+@router.get("/{avatar_id}")
+async def read_avatar(avatar_id: str, request: Request, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Servir un avatar avec ETag et Cache-Control (304 si le client l'a déjà).
+    """
+    etag = f'"{avatar_id}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    # L'ETag étant le hash du contenu, il suffit de vérifier que l'avatar
+    # existe (sans lire son contenu) : un identifiant inconnu reste un 404
+    tags = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in tags or "*" in tags:
+        if not await avatar_exists(db, avatar_id):
+            raise HTTPException(status_code=404, detail="Avatar introuvable")
+        return Response(status_code=304, headers=headers)
+
+    avatar = await get_avatar(db, avatar_id)
+    if not avatar:
+        raise HTTPException(status_code=404, detail="Avatar introuvable")
+
+    return Response(content=bytes(avatar["data"]), media_type=avatar.get("content_type", "image/png"), headers=headers)
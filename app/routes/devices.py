@@ -0,0 +1,141 @@
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Optional
+from app.db import get_db, mongo_budget
+from app.config import settings
+from app.crud.device import (
+    enroll_device,
+    claim_challenge,
+    record_unlock,
+    list_devices,
+    revoke_device,
+    device_public,
+)
+from app.models.views import AuthView
+from app.routes.auth import hashing_overloaded
+from app.utils.current_user import CurrentUser, get_current_user
+from app.utils.device_auth import (
+    generate_device_secret,
+    encode_secret,
+    derive_unlock_key,
+    create_device_challenge,
+    verify_device_challenge,
+    check_response,
+)
+from app.utils.hashing import hasher, HashingOverloadedError
+from app.utils.pin import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+
+
+router = APIRouter(prefix="/auth/devices", tags=["devices"])
+
+
+class EnrollDeviceRequest(BaseModel):
+    device_id: str
+    pin: str
+    name: Optional[str] = None
+
+class UnlockRequest(BaseModel):
+    challenge: str
+    response: str
+
+
+@router.post("/enroll")
+@mongo_budget(2)
+async def enroll(
+    data: EnrollDeviceRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Enrôler l'appareil après une connexion complète.
+    Le PIN est vérifié une dernière fois (bcrypt) ; le secret retourné doit
+    être conservé dans le stockage sécurisé de l'appareil.
+    """
+    try:
+        user = await current_user.load(AuthView)
+        if not user.pin:
+            raise HTTPException(status_code=400, detail="Aucun PIN défini pour cet utilisateur")
+        if not await hasher.verify(data.pin, user.pin):
+            raise HTTPException(status_code=401, detail="PIN incorrect")
+    except HashingOverloadedError:
+        raise hashing_overloaded()
+
+    device_secret = generate_device_secret()
+    device = await enroll_device(
+        db,
+        current_user.id,
+        data.device_id,
+        derive_unlock_key(device_secret, data.pin),
+        name=data.name
+    )
+
+    return {
+        "success": True,
+        "device": device_public(device),
+        "device_secret": encode_secret(device_secret)
+    }
+
+
+@router.post("/{device_key_id}/challenge")
+async def challenge(device_key_id: str):
+    """
+    Émettre un challenge signé (sans accès à la base).
+    """
+    token, _ = create_device_challenge(device_key_id)
+    return {"challenge": token, "expires_in": settings.device_challenge_ttl_seconds}
+
+
+@router.post("/{device_key_id}/unlock")
+@mongo_budget(3)
+async def unlock(device_key_id: str, data: UnlockRequest, db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Déverrouiller avec le PIN depuis un appareil enrôlé :
+    response = HMAC(HMAC(secret, PIN), challenge), vérifiée en quelques microsecondes.
+    """
+    nonce = verify_device_challenge(data.challenge, device_key_id)
+    if nonce is None:
+        raise HTTPException(status_code=401, detail="Challenge invalide ou expiré")
+
+    device = await claim_challenge(db, device_key_id, nonce, settings.device_challenge_ttl_seconds)
+    if device is None:
+        raise HTTPException(status_code=401, detail="Appareil inconnu, révoqué ou challenge déjà utilisé")
+
+    is_valid = check_response(device["unlock_key"], data.challenge, data.response)
+    await record_unlock(db, device_key_id, is_valid, settings.device_max_failed_attempts)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="PIN incorrect")
+
+    return {
+        "access_token": create_access_token(device["user_id"]),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "user_id": device["user_id"]
+    }
+
+
+@router.get("")
+@mongo_budget(1)
+async def read_devices(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Lister les appareils enrôlés de l'utilisateur.
+    """
+    return {"devices": await list_devices(db, current_user.id)}
+
+
+@router.delete("/{device_key_id}")
+@mongo_budget(1)
+async def delete_device(
+    device_key_id: str,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Révoquer un appareil.
+    """
+    if not await revoke_device(db, current_user.id, device_key_id):
+        raise HTTPException(status_code=404, detail="Appareil introuvable")
+    return {"success": True, "message": "Appareil révoqué"}
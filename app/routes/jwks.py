@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+from app.utils.keyring import keyring
+
+router = APIRouter(tags=["jwks"])
+
+# Les services en aval peuvent mettre les clés en cache ; une nouvelle clé
+# doit être publiée au moins ce délai avant de devenir active
+CACHE_CONTROL = "public, max-age=300"
+
+
+@router.get("/.well-known/jwks.json")
+async def read_jwks(response: Response):
+    """
+    Clés publiques de vérification des tokens (JWKS), indexées par `kid`.
+    """
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return keyring.jwks()
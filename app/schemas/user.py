@@ -1,14 +1,22 @@
-from typing import Optional
-from pydantic import BaseModel, EmailStr
+from typing import Annotated, Optional
+from pydantic import AfterValidator, BaseModel, EmailStr
+from app.utils.identifiers import normalize_email, normalize_phone
+
+# Identifiants mis sous forme canonique dès la validation de la requête
+# (email en minuscules, téléphone au format E.164)
+NormalizedEmail = Annotated[EmailStr, AfterValidator(normalize_email)]
+NormalizedPhone = Annotated[str, AfterValidator(normalize_phone)]
 
 
 # --- Schéma pour la création d'un utilisateur ---
 class UserCreate(BaseModel):
-    email: EmailStr
-    phone: str
+    email: NormalizedEmail
+    phone: NormalizedPhone
     name: str
     password: str
     device_id: Optional[str] = None  # Pour final-register
+    email_verification_token: str  # Preuve retournée par /verify-email-code
+    phone_verification_token: str  # Preuve retournée par /verify-phone-code
 
 
 # --- Schéma pour la réponse API utilisateur ---
@@ -22,8 +30,8 @@ class UserResponse(BaseModel):
 
 # --- Schéma pour la requête de connexion ---
 class LoginRequest(BaseModel):
-    email: Optional[EmailStr] = None
-    phone: Optional[str] = None
+    email: Optional[NormalizedEmail] = None
+    phone: Optional[NormalizedPhone] = None
     password: Optional[str] = None
     pin: Optional[str] = None
     device_id: Optional[str] = None
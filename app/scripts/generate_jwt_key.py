@@ -0,0 +1,27 @@
+# app/scripts/generate_jwt_key.py
+# Usage : python -m app.scripts.generate_jwt_key <kid>
+#
+# Rotation : générer la nouvelle clé, redémarrer (elle devient active si son
+# nom est le dernier par ordre alphabétique, ou via JWT_ACTIVE_KID), puis
+# supprimer l'ancienne clé une fois ses tokens expirés.
+
+import sys
+
+from app.config import settings
+from app.utils.signing_keys import generate_key_file
+
+
+def main():
+    if len(sys.argv) != 2:
+        print("Usage : python -m app.scripts.generate_jwt_key <kid>")
+        sys.exit(1)
+    if not settings.jwt_keys_dir:
+        print("JWT_KEYS_DIR n'est pas configuré")
+        sys.exit(1)
+
+    path = generate_key_file(settings.jwt_keys_dir, sys.argv[1], settings.jwt_algorithm)
+    print(f"Clé {settings.jwt_algorithm} écrite dans {path}")
+
+
+if __name__ == "__main__":
+    main()
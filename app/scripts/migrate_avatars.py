@@ -0,0 +1,22 @@
+# app/scripts/migrate_avatars.py
+# Usage : python -m app.scripts.migrate_avatars
+
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.crud.avatar import migrate_inline_avatars
+
+
+async def main():
+    client = AsyncIOMotorClient(settings.mongo_uri)
+    try:
+        migrated = await migrate_inline_avatars(client[settings.database_name])
+        print(f"{migrated} avatars migrés")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
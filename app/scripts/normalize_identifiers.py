@@ -0,0 +1,30 @@
+# app/scripts/normalize_identifiers.py
+# Usage : python -m app.scripts.normalize_identifiers [--batch-size 500] [--pause 0.1]
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.crud.user import normalize_existing_identifiers
+
+
+async def main(batch_size: int, pause: float):
+    client = AsyncIOMotorClient(settings.mongo_uri)
+    try:
+        stats = await normalize_existing_identifiers(client[settings.database_name], batch_size, pause)
+        print(
+            f"{stats['scanned']} utilisateurs parcourus, {stats['updated']} normalisés, "
+            f"{stats['conflicts']} conflits, {stats['invalid']} identifiants invalides"
+        )
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--pause", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.pause))
@@ -0,0 +1,35 @@
+# app/tasks.py
+# Tâches Celery (backend de notification optionnel)
+# Lancement : celery -A app.tasks worker
+
+import asyncio
+
+from celery import Celery
+
+from app.config import settings
+
+celery_app = Celery(
+    "visa",
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend,
+)
+celery_app.conf.task_track_started = True
+
+# Boucle persistante par processus worker : les pools SMTP/HTTP restent valides
+_loop = asyncio.new_event_loop()
+
+
+@celery_app.task(
+    name="notifications.deliver",
+    autoretry_for=(Exception,),
+    retry_backoff=settings.notification_retry_base_seconds,
+    retry_jitter=True,
+    max_retries=settings.notification_max_attempts - 1,
+)
+def deliver_notification(channel: str, recipient: str, code: str) -> None:
+    """
+    Envoyer un code de vérification depuis un worker Celery.
+    """
+    from app.utils.notifications import SENDERS
+
+    _loop.run_until_complete(SENDERS[channel](recipient, code))
@@ -0,0 +1,175 @@
+# app/utils/admission.py
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.metrics import Counter, Gauge, Histogram, registry
+
+admission_queue_depth = registry.register(Gauge(
+    "admission_queue_depth", "Requêtes en attente d'admission.", ("endpoint_class",)
+))
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight", "Requêtes admises en cours de traitement.", ("endpoint_class",)
+))
+admission_rejected = registry.register(Counter(
+    "admission_rejected_total", "Requêtes refusées par le contrôle d'admission.", ("endpoint_class", "reason")
+))
+admission_wait = registry.register(Histogram(
+    "admission_wait_seconds", "Attente dans la file d'admission.", ("endpoint_class",)
+))
+
+# Lissage de la durée de service (moyenne mobile exponentielle)
+SERVICE_TIME_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """
+    Levée quand une requête ne peut pas être servie avant son échéance.
+    """
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionGate:
+    """
+    Limite de concurrence d'une classe d'endpoints, avec file d'attente FIFO
+    bornée et échéance par requête. Une requête est refusée tout de suite si
+    la file est pleine ou si l'attente estimée dépasse l'échéance, et retirée
+    de la file quand l'échéance est atteinte : le serveur ne travaille que
+    pour des clients qui attendent encore la réponse.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, deadline: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_time: Optional[float] = None
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        """Attente estimée d'une nouvelle requête (0 tant qu'aucune mesure)."""
+        if self._service_time is None:
+            return 0.0
+        return (len(self._waiters) + 1) / self.max_concurrency * self._service_time
+
+    def _update_gauges(self) -> None:
+        admission_queue_depth.set(len(self._waiters), self.name)
+        admission_in_flight.set(self.in_flight, self.name)
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        admission_rejected.inc(self.name, reason)
+        return AdmissionRejected(reason, retry_after=max(1.0, self.expected_wait()))
+
+    def _pass_slot(self) -> None:
+        # La place est transmise directement au premier en attente encore vivant
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._update_gauges()
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+        if self.expected_wait() > self.deadline:
+            raise self._reject("deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.deadline)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # La place a pu être accordée au moment de l'échéance : la rendre
+            if waiter.done() and not waiter.cancelled():
+                self._pass_slot()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject("deadline")
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            admission_wait.observe(time.monotonic() - start, self.name)
+            self._update_gauges()
+
+    def release(self, service_time: float) -> None:
+        if self._service_time is None:
+            self._service_time = service_time
+        else:
+            self._service_time += SERVICE_TIME_ALPHA * (service_time - self._service_time)
+        self._pass_slot()
+        self._update_gauges()
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "deadline_seconds": self.deadline,
+            "service_time_ms": round(self._service_time * 1000, 3) if self._service_time is not None else None,
+        }
+
+
+# Classes d'endpoints coûteux (hachage) : chacune a sa propre capacité
+ENDPOINT_CLASSES = ("login", "register", "pin")
+
+gates: Dict[str, AdmissionGate] = {
+    name: AdmissionGate(
+        name,
+        max_concurrency=settings.admission_max_concurrency,
+        max_queue=settings.admission_max_queue,
+        deadline=settings.admission_deadline_seconds,
+    )
+    for name in ENDPOINT_CLASSES
+} if settings.admission_enabled else {}
+
+
+def admission(endpoint_class: str) -> Callable:
+    """
+    Dépendance FastAPI : admettre la requête dans la classe `endpoint_class`
+    ou répondre 503 avec Retry-After.
+
+        @router.post("/login", dependencies=[Depends(admission("login"))])
+    """
+    async def dependency():
+        gate = gates.get(endpoint_class)
+        if gate is None:
+            yield
+            return
+        try:
+            await gate.acquire()
+        except AdmissionRejected as e:
+            raise HTTPException(
+                status_code=503,
+                detail="Serveur surchargé, veuillez réessayer",
+                headers={"Retry-After": str(math.ceil(e.retry_after))}
+            )
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            gate.release(time.monotonic() - start)
+
+    return dependency
@@ -0,0 +1,128 @@
+# app/utils/avatar.py
+
+import asyncio
+import hashlib
+import io
+import random
+import string
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+from app.config import settings
+
+AVATAR_COLORS = ["#1abc9c", "#3498db", "#9b59b6", "#e67e22", "#e74c3c", "#2ecc71", "#f1c40f"]
+AVATAR_SIZE = 128
+FONT_SIZE = 64  # Ajustable selon la taille de l'image
+TEXT_COLOR = "#ffffff"
+
+
+@dataclass
+class RenderedAvatar:
+    avatar_id: str  # Hash SHA-256 du PNG (clé de la collection d'avatars)
+    data: bytes
+    stored: bool = False  # Déjà enregistré en base par ce processus
+
+
+@lru_cache(maxsize=1)
+def _font():
+    # Police chargée une seule fois par processus
+    # (PIL n'est importé qu'au premier rendu)
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("arial.ttf", FONT_SIZE)
+    except IOError:
+        return ImageFont.load_default()
+
+
+def get_initials(name: str) -> str:
+    """
+    Initiales (1 ou 2 lettres) d'un nom, "U" par défaut.
+    """
+    return "".join([word[0].upper() for word in name.split()[:2]]) or "U"
+
+
+def render_avatar(color: str, initials: str) -> RenderedAvatar:
+    """
+    Génère un avatar avec les initiales centrées sur un fond de couleur.
+    """
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (AVATAR_SIZE, AVATAR_SIZE), color=color)
+    draw = ImageDraw.Draw(img)
+    font = _font()
+
+    # Calculer la taille du texte pour le centrer
+    bbox = draw.textbbox((0, 0), initials, font=font)
+    w = bbox[2] - bbox[0]
+    h = bbox[3] - bbox[1]
+    draw.text(((AVATAR_SIZE - w) / 2, (AVATAR_SIZE - h) / 2), initials, fill=TEXT_COLOR, font=font)
+
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    data = buffered.getvalue()
+    return RenderedAvatar(avatar_id=hashlib.sha256(data).hexdigest(), data=data)
+
+
+class AvatarCache:
+    """
+    Cache LRU des avatars encodés, par (couleur, initiales).
+    Les rendus manquants sont calculés hors de la boucle d'événements.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], RenderedAvatar]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _put(self, key: Tuple[str, str], avatar: RenderedAvatar) -> RenderedAvatar:
+        # Un rendu concurrent a pu arriver entre-temps : garder le premier
+        avatar = self._entries.setdefault(key, avatar)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return avatar
+
+    async def get(self, color: str, initials: str) -> RenderedAvatar:
+        key = (color, initials)
+        avatar = self._entries.get(key)
+        if avatar is not None:
+            self._entries.move_to_end(key)
+            return avatar
+
+        loop = asyncio.get_running_loop()
+        avatar = await loop.run_in_executor(None, render_avatar, color, initials)
+        return self._put(key, avatar)
+
+    async def prerender(self) -> int:
+        """
+        Pré-calculer tout l'espace des initiales ASCII (A-Z et AA-ZZ)
+        pour chaque couleur, dans la limite de la taille du cache.
+        """
+        letters = string.ascii_uppercase
+        all_initials = list(letters) + [a + b for a in letters for b in letters]
+        loop = asyncio.get_running_loop()
+        rendered = 0
+        for initials in all_initials:
+            for color in AVATAR_COLORS:
+                if rendered >= self.max_size:
+                    return rendered
+                if (color, initials) not in self._entries:
+                    avatar = await loop.run_in_executor(None, render_avatar, color, initials)
+                    self._put((color, initials), avatar)
+                rendered += 1
+        return rendered
+
+
+avatar_cache = AvatarCache(max_size=settings.avatar_cache_size)
+
+
+async def generate_default_avatar(name: str) -> RenderedAvatar:
+    """
+    Avatar par défaut avec les initiales et une couleur aléatoire.
+    """
+    return await avatar_cache.get(random.choice(AVATAR_COLORS), get_initials(name))
@@ -0,0 +1,60 @@
+# app/utils/code_issuer.py
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.utils.notifications import NotificationBackend
+from app.utils.singleflight import SingleFlight
+from app.utils.verification import VerificationStore
+
+
+@dataclass
+class IssuedCode:
+    sent: bool  # False si un code envoyé récemment est toujours en vigueur
+    retry_after: int  # Secondes avant de pouvoir demander un nouvel envoi
+    notification_id: Optional[str] = None
+
+
+class CodeIssuer:
+    """
+    Génère, enregistre et envoie les codes de vérification.
+    Les demandes concurrentes pour un même destinataire partagent un seul
+    envoi, et aucun nouvel envoi n'a lieu pendant la période de cooldown.
+    """
+
+    def __init__(
+        self,
+        store: VerificationStore,
+        notifications: NotificationBackend,
+        generate: Callable[[], str],
+        cooldown: int = 60,
+    ):
+        self.store = store
+        self.notifications = notifications
+        self.generate = generate
+        self.cooldown = cooldown
+        self._flight = SingleFlight()
+
+    async def issue(self, channel: str, notify_channel: str, recipient: str) -> IssuedCode:
+        """
+        Émettre un code pour `recipient` (`channel` : clé du stockage,
+        `notify_channel` : canal d'envoi).
+        """
+        result, _ = await self._flight.do(
+            (channel, recipient),
+            lambda: self._issue(channel, notify_channel, recipient),
+        )
+        return result
+
+    async def _issue(self, channel: str, notify_channel: str, recipient: str) -> IssuedCode:
+        existing = await self.store.get_code(channel, recipient)
+        if existing is not None:
+            elapsed = time.time() - existing.created_at
+            if elapsed < self.cooldown:
+                return IssuedCode(sent=False, retry_after=int(self.cooldown - elapsed) + 1)
+
+        code = self.generate()
+        await self.store.put_code(channel, recipient, code)
+        notification = await self.notifications.enqueue(notify_channel, recipient, code)
+        return IssuedCode(sent=True, retry_after=self.cooldown, notification_id=notification.id)
@@ -0,0 +1,222 @@
+# app/utils/current_user.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Type
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.config import settings
+from app.crud.user import get_user_by_id
+from app.db import get_db, raw_db
+from app.models.views import V, ProfileView
+from app.utils.pin import decode_access_token
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenClaims:
+    user_id: str
+    jti: Optional[str]
+    expires_at: float  # Timestamp epoch (secondes)
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class TokenCache:
+    """
+    LRU des tokens déjà vérifiés, indexés par leur signature et conservés
+    jusqu'à leur `exp`. Un succès évite le décodage et la vérification de signature.
+    """
+
+    def __init__(self, max_size: int = 10_000):
+        self.max_size = max_size
+        # signature -> (partie signée, claims)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[TokenClaims]:
+        signing_input, _, signature = token.rpartition(".")
+        entry = self._entries.get(signature)
+        if entry is None:
+            return None
+        cached_input, claims = entry
+        # La signature seule ne suffit pas : l'en-tête et le payload doivent correspondre
+        if cached_input != signing_input or claims.expires_at <= time.time():
+            del self._entries[signature]
+            return None
+        self._entries.move_to_end(signature)
+        return claims
+
+    def put(self, token: str, claims: TokenClaims) -> None:
+        if not self.max_size:
+            return
+        signing_input, _, signature = token.rpartition(".")
+        self._entries[signature] = (signing_input, claims)
+        self._entries.move_to_end(signature)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevocationList:
+    """
+    Identifiants (`jti`) des tokens révoqués avant leur expiration.
+    La liste est gardée en mémoire et synchronisée périodiquement depuis
+    une collection MongoDB dont l'index TTL purge les tokens expirés.
+    """
+
+    def __init__(self, db, collection: str = "revoked_tokens", sync_interval: float = 5.0):
+        self.db = db
+        self.collection_name = collection
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, float] = {}  # jti -> expiration (epoch)
+        self._synced_until: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self) -> None:
+        collection = self.db[self.collection_name]
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+        await collection.create_index("revoked_at")
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    async def revoke(self, db: AsyncIOMotorDatabase, claims: TokenClaims) -> None:
+        """
+        Révoquer un token : effet immédiat dans ce worker, et dans les autres
+        au plus tard après un intervalle de synchronisation.
+        """
+        if claims.jti is None:
+            return
+        self._revoked[claims.jti] = claims.expires_at
+        await db[self.collection_name].update_one(
+            {"_id": claims.jti},
+            {"$setOnInsert": {
+                "user_id": claims.user_id,
+                "expires_at": datetime.fromtimestamp(claims.expires_at, timezone.utc),
+                "revoked_at": datetime.now(timezone.utc),
+            }},
+            upsert=True
+        )
+
+    async def sync(self) -> None:
+        """
+        Charger les révocations enregistrées depuis la dernière synchronisation.
+        """
+        query = {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+        if self._synced_until is not None:
+            query["revoked_at"] = {"$gte": self._synced_until}
+        started = datetime.now(timezone.utc)
+
+        cursor = self.db[self.collection_name].find(query, projection={"expires_at": 1})
+        async for doc in cursor:
+            expires_at = doc["expires_at"]
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self._revoked[doc["_id"]] = expires_at.timestamp()
+
+        # Prochaine lecture avec une marge d'un intervalle : une révocation
+        # écrite pendant cette lecture, ou datée par un worker dont l'horloge
+        # retarde, est relue au prochain passage au lieu d'être manquée
+        self._synced_until = started - timedelta(seconds=self.sync_interval)
+        now = time.time()
+        for jti in [jti for jti, exp in self._revoked.items() if exp <= now]:
+            del self._revoked[jti]
+
+    async def start(self) -> None:
+        await self.sync()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Échec de synchronisation des tokens révoqués")
+
+
+token_cache = TokenCache(max_size=settings.auth_token_cache_size)
+revocation_list = RevocationList(raw_db, sync_interval=settings.auth_revocation_sync_seconds)
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+@dataclass
+class CurrentUser:
+    """
+    Utilisateur authentifié. Le document n'est lu que si l'endpoint en a besoin.
+    """
+    claims: TokenClaims
+    db: AsyncIOMotorDatabase
+    _loaded: Dict[type, object] = field(default_factory=dict, repr=False)
+
+    @property
+    def id(self) -> str:
+        return self.claims.user_id
+
+    async def load(self, view: Type[V] = ProfileView) -> V:
+        if view not in self._loaded:
+            user = await get_user_by_id(self.db, self.id, view)
+            if user is None:
+                raise unauthorized("Utilisateur introuvable")
+            self._loaded[view] = user
+        return self._loaded[view]
+
+
+def unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=401,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+def authenticate(token: str) -> TokenClaims:
+    """
+    Retourner les claims d'un token d'accès valide et non révoqué.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        payload = decode_access_token(token)
+        if payload is None:
+            raise unauthorized("Token invalide ou expiré")
+        claims = TokenClaims(
+            user_id=payload["sub"],
+            jti=payload.get("jti"),
+            expires_at=float(payload["exp"]),
+            email=payload.get("email"),
+            phone=payload.get("phone"),
+        )
+        token_cache.put(token, claims)
+
+    if revocation_list.is_revoked(claims.jti):
+        raise unauthorized("Token révoqué")
+    return claims
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> CurrentUser:
+    """
+    Dépendance des endpoints protégés (en-tête `Authorization: Bearer <token>`).
+    """
+    if credentials is None:
+        raise unauthorized("Authentification requise")
+    return CurrentUser(claims=authenticate(credentials.credentials), db=db)
@@ -0,0 +1,74 @@
+# app/utils/device_auth.py
+
+import base64
+import hashlib
+import hmac
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+import jwt
+
+from app.config import settings
+from app.utils.keyring import keyring
+
+CHALLENGE_TYPE = "device_challenge"
+
+
+def generate_device_secret() -> bytes:
+    return secrets.token_bytes(32)
+
+
+def encode_secret(secret: bytes) -> str:
+    return base64.urlsafe_b64encode(secret).rstrip(b"=").decode()
+
+
+def derive_unlock_key(device_secret: bytes, pin: str) -> bytes:
+    """
+    Clé de déverrouillage = HMAC(secret de l'appareil, PIN).
+    L'appareil la recalcule à chaque saisie du PIN ; le serveur ne stocke
+    que la clé, jamais le secret.
+    """
+    return hmac.new(device_secret, pin.encode(), hashlib.sha256).digest()
+
+
+def create_device_challenge(device_key_id: str) -> Tuple[str, str]:
+    """
+    Challenge signé et de courte durée (aucun état côté serveur avant la réponse).
+    Retourne le token et son nonce.
+    """
+    now = datetime.now(timezone.utc)
+    nonce = secrets.token_hex(16)
+    token = keyring.sign({
+        "sub": device_key_id,
+        "typ": CHALLENGE_TYPE,
+        "nonce": nonce,
+        "iat": now,
+        "exp": now + timedelta(seconds=settings.device_challenge_ttl_seconds),
+    })
+    return token, nonce
+
+
+def verify_device_challenge(token: str, device_key_id: str) -> Optional[str]:
+    """
+    Vérifier qu'un challenge a été émis pour cet appareil et n'a pas expiré.
+    Retourne son nonce.
+    """
+    try:
+        payload = keyring.decode(token)
+    except jwt.PyJWTError:
+        return None
+    if payload.get("typ") != CHALLENGE_TYPE or payload.get("sub") != device_key_id:
+        return None
+    return payload.get("nonce")
+
+
+def compute_response(unlock_key: bytes, challenge: str) -> str:
+    """
+    Réponse attendue au challenge (calculée de la même façon sur l'appareil).
+    """
+    return hmac.new(unlock_key, challenge.encode(), hashlib.sha256).hexdigest()
+
+
+def check_response(unlock_key: bytes, challenge: str, response: str) -> bool:
+    return hmac.compare_digest(compute_response(unlock_key, challenge), response)
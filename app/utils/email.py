@@ -1,9 +1,38 @@
-import random
 from email.message import EmailMessage
-import aiosmtplib
+from typing import Optional
 from app.config import settings
+from app.utils.smtp_pool import SMTPConnectionPool
 
-async def send_verification_email(email: str, code: str):
+# Pool de connexions SMTP partagé (STARTTLS/AUTH une seule fois par connexion)
+smtp_pool = SMTPConnectionPool(
+    hostname=settings.smtp_host,
+    port=settings.smtp_port,
+    username=settings.smtp_user,
+    password=settings.smtp_password,
+    start_tls=settings.smtp_start_tls,
+    size=settings.smtp_pool_size,
+    keepalive=settings.smtp_keepalive_seconds,
+    timeout=settings.smtp_timeout_seconds,
+    max_messages_per_connection=settings.smtp_max_messages_per_connection,
+)
+
+# Serveur SMTP de secours (optionnel)
+smtp_fallback_pool: Optional[SMTPConnectionPool] = None
+if settings.smtp_fallback_host:
+    smtp_fallback_pool = SMTPConnectionPool(
+        hostname=settings.smtp_fallback_host,
+        port=settings.smtp_fallback_port,
+        username=settings.smtp_fallback_user,
+        password=settings.smtp_fallback_password,
+        start_tls=settings.smtp_start_tls,
+        size=settings.smtp_pool_size,
+        keepalive=settings.smtp_keepalive_seconds,
+        timeout=settings.smtp_timeout_seconds,
+        max_messages_per_connection=settings.smtp_max_messages_per_connection,
+    )
+
+
+def build_verification_email(email: str, code: str) -> EmailMessage:
     # Corps HTML décoré
     html_content = f"""
     <html>
@@ -36,15 +65,10 @@ async def send_verification_email(email: str, code: str):
     message["Subject"] = "🔐 Votre code de vérification"
     message.set_content(f"Bonjour,\n\nVotre code de vérification est : {code}\n\nMerci!")
     message.add_alternative(html_content, subtype="html")
+    return message
 
-    # Envoi du mail
-    await aiosmtplib.send(
-        message,
-        hostname=settings.smtp_host,
-        port=settings.smtp_port,
-        start_tls=True,
-        username=settings.smtp_user,
-        password=settings.smtp_password,
-    )
 
+async def send_verification_email(email: str, code: str, pool: Optional[SMTPConnectionPool] = None):
+    # Envoi du mail via le pool de connexions
+    await (pool or smtp_pool).send(build_verification_email(email, code))
     return code
\ No newline at end of file
@@ -0,0 +1,227 @@
+# app/utils/hashing.py
+
+import asyncio
+import logging
+import secrets
+import statistics
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.config import settings
+from app.utils.metrics import Gauge, registry, span
+
+logger = logging.getLogger(__name__)
+
+
+def _build_context() -> CryptContext:
+    """
+    Construit le contexte à partir de la configuration.
+    Le premier schéma est utilisé pour les nouveaux hash, les suivants sont
+    dépréciés et migrés lors de la prochaine connexion réussie.
+    """
+    options: Dict[str, Any] = {}
+    if "argon2" in settings.hash_schemes:
+        options["argon2__memory_cost"] = settings.hash_argon2_memory_kib
+        options["argon2__parallelism"] = settings.hash_argon2_parallelism
+    return CryptContext(schemes=settings.hash_schemes, deprecated="auto", **options)
+
+
+# Contexte de hachage unique partagé par les mots de passe et les PINs
+pwd_context = _build_context()
+
+
+class HashingOverloadedError(Exception):
+    """
+    Levée quand la file d'attente du pool de hachage est pleine.
+    """
+
+
+@lru_cache(maxsize=8)
+def _context_from_string(config: str) -> CryptContext:
+    # Reconstruit le contexte dans le worker (utile pour le pool de processus)
+    return CryptContext.from_string(config)
+
+
+def _hash(config: str, secret: str) -> str:
+    return _context_from_string(config).hash(secret)
+
+
+def _verify(config: str, secret: str, hashed: str) -> bool:
+    try:
+        return _context_from_string(config).verify(secret, hashed)
+    except (ValueError, TypeError):
+        return False
+
+
+def _verify_and_update(config: str, secret: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    try:
+        return _context_from_string(config).verify_and_update(secret, hashed)
+    except (ValueError, TypeError):
+        return False, None
+
+
+def _measure_ms(handler, samples: int = 3) -> float:
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        handler.hash("calibration")
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def calibrate_cost(
+    context: CryptContext,
+    target_ms: float,
+    min_rounds: int = 10,
+    max_rounds: int = 15,
+) -> Dict[str, Any]:
+    """
+    Mesure le temps de hachage sur cette machine et retourne les options de
+    coût du schéma par défaut qui respectent le budget `target_ms`.
+    Le coût choisi devient aussi le minimum : les hash plus faibles seront
+    re-hachés à la prochaine vérification réussie.
+    """
+    scheme = context.default_scheme()
+    handler = context.handler(scheme)
+
+    if scheme == "bcrypt":
+        # Chaque round supplémentaire double le coût
+        base = _measure_ms(handler.using(rounds=min_rounds))
+        rounds = min_rounds
+        while rounds < max_rounds and base * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+            rounds += 1
+        return {"bcrypt__default_rounds": rounds, "bcrypt__min_rounds": rounds}
+
+    if scheme == "argon2":
+        # Le coût est linéaire en time_cost (mémoire fixée par la configuration)
+        base = _measure_ms(handler.using(rounds=1))
+        time_cost = max(1, min(10, int(target_ms // max(base, 0.001))))
+        return {"argon2__default_rounds": time_cost, "argon2__min_rounds": time_cost}
+
+    return {}
+
+
+class HashingService:
+    """
+    Exécute le hachage et la vérification hors de la boucle d'événements,
+    sur un pool de threads ou de processus avec une file d'attente bornée.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        executor: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 64,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Type d'exécuteur inconnu: {executor}")
+
+        self.context = context
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._config = context.to_string()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Nombre d'opérations en cours ou en attente."""
+        return self._pending
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hashing"
+                )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.capacity:
+            raise HashingOverloadedError("Trop d'opérations de hachage en attente")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Attente dans la file comprise : c'est ce que paie la requête
+            with span("hashing", fn.__name__.lstrip("_")):
+                return await loop.run_in_executor(self._get_executor(), fn, self._config, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, secret: str) -> str:
+        """
+        Hacher un secret (mot de passe ou PIN).
+        """
+        return await self._run(_hash, secret)
+
+    async def verify(self, secret: str, hashed: Optional[str]) -> bool:
+        """
+        Vérifier un secret contre son hash. Retourne False si le hash est invalide.
+        """
+        if not hashed:
+            return False
+        return await self._run(_verify, secret, hashed)
+
+    async def verify_and_update(self, secret: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifier un secret et retourner un nouveau hash si le schéma ou le coût
+        stocké est obsolète (None sinon).
+        """
+        if not hashed:
+            return False, None
+        return await self._run(_verify_and_update, secret, hashed)
+
+    def configure(self, **options) -> None:
+        """
+        Mettre à jour les options du contexte (coût, schémas) à chaud.
+        """
+        self.context.update(**options)
+        self._config = self.context.to_string()
+
+    async def calibrate(self, target_ms: float, min_rounds: int = 10, max_rounds: int = 15) -> Dict[str, Any]:
+        """
+        Calibrer le coût de hachage sur cette machine puis l'appliquer.
+        """
+        options = await asyncio.to_thread(calibrate_cost, self.context, target_ms, min_rounds, max_rounds)
+        if options:
+            self.configure(**options)
+        logger.info("Coût de hachage calibré pour %.0f ms: %s", target_ms, options)
+        return options
+
+    async def warm_up(self) -> None:
+        """
+        Démarrer tous les workers et charger le backend de hachage,
+        pour que la première connexion ne paie pas ce coût.
+        """
+        secret = secrets.token_hex(8)
+        await asyncio.gather(*(self._run(_hash, secret) for _ in range(self.max_workers)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+hasher = HashingService(
+    pwd_context,
+    executor=settings.hash_executor,
+    max_workers=settings.hash_max_workers,
+    max_queue=settings.hash_max_queue,
+)
+
+registry.register(Gauge(
+    "hashing_pending", "Opérations de hachage en cours ou en attente.", function=lambda: hasher.pending
+))
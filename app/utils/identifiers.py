@@ -0,0 +1,58 @@
+# app/utils/identifiers.py
+
+import re
+from typing import Optional
+
+from app.config import settings
+
+# Séparateurs tolérés dans un numéro saisi : espaces, tirets, points, parenthèses
+PHONE_SEPARATORS = re.compile(r"[\s\-.()/]")
+E164 = re.compile(r"^\+[1-9]\d{6,14}$")
+
+
+class InvalidIdentifierError(ValueError):
+    """
+    Levée quand un email ou un numéro ne peut pas être mis sous forme canonique.
+    """
+
+
+def normalize_email(email: str) -> str:
+    """
+    Forme canonique d'un email : sans espaces autour, en minuscules.
+    """
+    email = email.strip().lower()
+    if "@" not in email:
+        raise InvalidIdentifierError("Adresse email invalide")
+    return email
+
+
+def normalize_phone(phone: str, default_country_code: Optional[str] = None) -> str:
+    """
+    Forme canonique E.164 d'un numéro (ex: "+22670123456").
+    Un numéro national (sans indicatif) reçoit `phone_default_country_code`.
+    """
+    default_country_code = default_country_code or settings.phone_default_country_code
+    number = PHONE_SEPARATORS.sub("", phone.strip())
+
+    if number.startswith("00"):
+        number = "+" + number[2:]
+    elif not number.startswith("+"):
+        if not default_country_code:
+            raise InvalidIdentifierError("Le numéro doit commencer par l'indicatif international (+...)")
+        # Le préfixe national (0) disparaît au format international
+        number = f"+{default_country_code.lstrip('+')}{number.lstrip('0')}"
+
+    if not E164.match(number):
+        raise InvalidIdentifierError("Numéro de téléphone invalide")
+    return number
+
+
+def normalize_identifier(field: str, value: str) -> str:
+    """
+    Normaliser la valeur d'un champ de recherche ("email", "phone" ; autres inchangés).
+    """
+    if field == "email":
+        return normalize_email(value)
+    if field == "phone":
+        return normalize_phone(value)
+    return value
@@ -0,0 +1,142 @@
+# app/utils/keyring.py
+
+import json
+import logging
+import secrets
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import jwt
+
+from app.config import settings
+from app.utils.signing_keys import generate_private_key, load_private_key
+
+logger = logging.getLogger(__name__)
+
+# Clé HS256 codée en dur avant les clés asymétriques : publique (historique
+# du dépôt), elle ne doit jamais servir à vérifier un token
+LEGACY_PLACEHOLDER_SECRET = "your-secret-key-here"
+
+# Algorithmes asymétriques pris en charge -> classe PyJWT (export JWK)
+ALGORITHMS = {
+    "EdDSA": jwt.algorithms.OKPAlgorithm,
+    "ES256": jwt.algorithms.ECAlgorithm,
+}
+
+
+@dataclass
+class SigningKey:
+    kid: str
+    algorithm: str
+    private_key: Any  # Objet clé déjà chargé (réutilisé à chaque signature)
+    public_key: Any
+
+    def jwk(self) -> Dict[str, Any]:
+        jwk = json.loads(ALGORITHMS[self.algorithm].to_jwk(self.public_key))
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    """
+    Clés de signature des tokens, identifiées par `kid`.
+    La clé active signe ; toutes les clés publiées restent valides pour la
+    vérification, ce qui permet la rotation sans invalider les tokens émis.
+    """
+
+    def __init__(
+        self,
+        keys: List[SigningKey],
+        active_kid: str,
+        legacy_secret: Optional[str] = None,
+    ):
+        self._keys = {key.kid: key for key in keys}
+        if active_kid not in self._keys:
+            raise ValueError(f"Clé active inconnue: {active_kid}")
+        self.active = self._keys[active_kid]
+        # Tokens d'accès HS256 émis avant la rotation vers les clés asymétriques
+        self.legacy_secret = legacy_secret
+
+    @property
+    def keys(self) -> List[SigningKey]:
+        return list(self._keys.values())
+
+    def sign(self, payload: Dict[str, Any]) -> str:
+        return jwt.encode(
+            payload,
+            self.active.private_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+        )
+
+    def decode(self, token: str, allow_legacy: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Vérifier un token avec la clé désignée par son `kid`.
+        `allow_legacy` accepte aussi un token HS256 sans kid signé avec
+        `legacy_secret` : réservé aux tokens d'accès, jamais aux preuves de
+        vérification ni aux challenges d'appareil.
+        Lève jwt.PyJWTError si le token est invalide.
+        """
+        header = jwt.get_unverified_header(token)
+        kid = header.get("kid")
+        if kid is None and allow_legacy and self.legacy_secret:
+            return jwt.decode(token, self.legacy_secret, algorithms=["HS256"], **kwargs)
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"kid inconnu: {kid}")
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm], **kwargs)
+
+    def jwks(self) -> Dict[str, Any]:
+        return {"keys": [key.jwk() for key in self._keys.values()]}
+
+
+def load_legacy_secret() -> Optional[str]:
+    """
+    Secret des anciens tokens d'accès HS256, seulement si
+    `jwt_accept_legacy_tokens` est activé. La clé d'exemple historique est
+    refusée : elle est publique, tout token signé avec elle serait forgeable.
+    """
+    if settings.jwt_legacy_secret == LEGACY_PLACEHOLDER_SECRET:
+        raise ValueError("jwt_legacy_secret est la clé d'exemple publique du dépôt : la remplacer ou la retirer")
+    if not settings.jwt_accept_legacy_tokens:
+        return None
+    if not settings.jwt_legacy_secret:
+        raise ValueError("jwt_accept_legacy_tokens exige jwt_legacy_secret (secret HS256 utilisé en production)")
+    return settings.jwt_legacy_secret
+
+
+def load_keyring() -> KeyRing:
+    """
+    Charger les clés privées `<kid>.pem` de `jwt_keys_dir`.
+    Sans clé, le démarrage échoue : une clé générée par processus ne serait
+    pas partagée entre workers et ne survivrait pas au redémarrage. Seul
+    `jwt_allow_ephemeral_key` (développement) autorise une clé éphémère.
+    """
+    algorithm = settings.jwt_algorithm
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algorithme de signature non pris en charge: {algorithm}")
+
+    keys: List[SigningKey] = []
+    if settings.jwt_keys_dir:
+        for path in sorted(Path(settings.jwt_keys_dir).glob("*.pem")):
+            private_key = load_private_key(path, algorithm)
+            keys.append(SigningKey(path.stem, algorithm, private_key, private_key.public_key()))
+
+    if not keys:
+        if not settings.jwt_allow_ephemeral_key:
+            raise ValueError(
+                "Aucune clé de signature dans jwt_keys_dir : générer une clé avec "
+                "python -m app.scripts.generate_jwt_key <kid> (ou JWT_ALLOW_EPHEMERAL_KEY=true en développement)"
+            )
+        logger.warning("Aucune clé de signature configurée (jwt_keys_dir), génération d'une clé éphémère")
+        private_key = generate_private_key(algorithm)
+        keys.append(SigningKey(secrets.token_hex(8), algorithm, private_key, private_key.public_key()))
+
+    # Par défaut, la dernière clé par ordre de nom (ex: 2024-06.pem) signe
+    active_kid = settings.jwt_active_kid or keys[-1].kid
+    return KeyRing(keys, active_kid, legacy_secret=load_legacy_secret())
+
+
+keyring = load_keyring()
@@ -0,0 +1,215 @@
+# app/utils/mongo_monitor.py
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Commandes CRUD suivies (hello, ping, getMore, explain... sont ignorées)
+MONITORED_COMMANDS = {"find", "insert", "update", "delete", "findAndModify", "count", "aggregate"}
+
+# Commandes dont le filtre peut être expliqué comme un find
+EXPLAINABLE_COMMANDS = {"find", "update", "delete", "findAndModify", "count"}
+
+
+def _shape(value: Any) -> Any:
+    """
+    Forme d'un filtre : les valeurs sont remplacées par 1, les opérateurs gardés.
+    {"email": "a@b.c", "_id": {"$ne": X}} -> {"_id": {"$ne": 1}, "email": 1}
+    """
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(item) for item in value[:1]]
+    return 1
+
+
+def extract_filter(command_name: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if command_name in ("find", "count"):
+        return command.get("filter", command.get("query")) or {}
+    if command_name == "findAndModify":
+        return command.get("query") or {}
+    if command_name == "update":
+        updates = command.get("updates") or [{}]
+        return updates[0].get("q") or {}
+    if command_name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return deletes[0].get("q") or {}
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match", {}) if pipeline else {}
+    return None
+
+
+def query_shape(command_name: str, command: Dict[str, Any]) -> str:
+    collection = command.get(command_name)
+    query = extract_filter(command_name, command)
+    if query is None:
+        return f"{collection}.{command_name}"
+    return f"{collection}.{command_name} {json.dumps(_shape(query), sort_keys=True, default=str)}"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class ShapeStats:
+    """
+    Compteurs d'une forme de requête ; les percentiles portent sur les
+    `window` dernières exécutions.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.failures = 0
+        self.slow = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.collscan: Optional[bool] = None  # None tant que non expliquée
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, duration_ms: float, failed: bool, slow: bool) -> None:
+        self.count += 1
+        self.failures += failed
+        self.slow += slow
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.latencies.append(duration_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "slow": self.slow,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 3) if latencies else 0.0,
+            "p95_ms": round(_percentile(latencies, 95), 3) if latencies else 0.0,
+            "p99_ms": round(_percentile(latencies, 99), 3) if latencies else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "collscan": self.collscan,
+        }
+
+
+def uses_collscan(plan: Any) -> bool:
+    """
+    Chercher un étage COLLSCAN dans un plan d'exécution (explain).
+    """
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(uses_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(uses_collscan(item) for item in plan)
+    return False
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """
+    Écouteur pymongo : statistiques par forme de requête, journal des
+    requêtes lentes et, en option, explain des nouvelles formes pour
+    signaler celles qui parcourent toute la collection.
+
+    Les callbacks sont appelés depuis les threads de Motor : l'état partagé
+    est protégé par un verrou et les explain sont planifiés sur la boucle.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, explain: bool = False, max_shapes: int = 1000, max_in_flight: int = 10_000):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+        self._shapes: Dict[str, ShapeStats] = {}
+        self._in_flight: Dict[Tuple[int, Any], Tuple[str, str, Dict[str, Any]]] = {}
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, client, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Donner accès au client Motor et à la boucle (nécessaire pour explain).
+        """
+        self._client = client
+        self._loop = loop
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in MONITORED_COMMANDS:
+            return
+        shape = query_shape(event.command_name, event.command)
+        with self._lock:
+            if len(self._in_flight) < self.max_in_flight:
+                self._in_flight[(event.request_id, event.connection_id)] = (shape, event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed: bool) -> None:
+        if event.command_name not in MONITORED_COMMANDS:
+            return
+        duration_ms = event.duration_micros / 1000
+        slow = duration_ms >= self.slow_ms
+
+        with self._lock:
+            started = self._in_flight.pop((event.request_id, event.connection_id), None)
+            if started is None:
+                return
+            shape, database, command = started
+            stats = self._shapes.get(shape)
+            is_new = stats is None
+            if is_new:
+                if len(self._shapes) >= self.max_shapes:
+                    return
+                stats = self._shapes[shape] = ShapeStats()
+            stats.record(duration_ms, failed, slow)
+
+        if slow:
+            logger.warning("Requête MongoDB lente (%.1f ms): %s", duration_ms, shape)
+        if is_new and self.explain and event.command_name in EXPLAINABLE_COMMANDS:
+            self._schedule_explain(shape, database, event.command_name, command)
+
+    def _schedule_explain(self, shape: str, database: str, command_name: str, command: Dict[str, Any]) -> None:
+        if self._client is None or self._loop is None or self._loop.is_closed():
+            return
+        query = extract_filter(command_name, command)
+        collection = command.get(command_name)
+        self._loop.call_soon_threadsafe(
+            lambda: asyncio.ensure_future(self._explain(shape, database, collection, query))
+        )
+
+    async def _explain(self, shape: str, database: str, collection: str, query: Dict[str, Any]) -> None:
+        try:
+            result = await self._client[database].command(
+                "explain", {"find": collection, "filter": query}, verbosity="queryPlanner"
+            )
+        except Exception as e:
+            logger.debug("Explain impossible pour %s: %s", shape, e)
+            return
+
+        collscan = uses_collscan(result.get("queryPlanner", {}).get("winningPlan"))
+        with self._lock:
+            if shape in self._shapes:
+                self._shapes[shape].collscan = collscan
+        if collscan:
+            logger.warning("Requête MongoDB sans index (COLLSCAN): %s", shape)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            shapes = {shape: stats.to_dict() for shape, stats in self._shapes.items()}
+        return {
+            "slow_threshold_ms": self.slow_ms,
+            "shapes": dict(sorted(shapes.items(), key=lambda item: item[1]["count"] * item[1]["mean_ms"], reverse=True)),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
@@ -0,0 +1,341 @@
+# app/utils/notifications.py
+
+import asyncio
+import logging
+import random
+import secrets
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.email import send_verification_email, smtp_fallback_pool
+from app.utils.whatsapp import send_whatsapp_code, send_sms_code
+from app.utils.notifier import ChannelNotifier, CircuitBreaker, LatencyTracker, Provider
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryStatus(str, Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    RETRYING = "retrying"
+    SENT = "sent"
+    FAILED = "failed"
+    REPLACED = "replaced"  # Remplacé par un envoi plus récent avant de partir
+
+
+class NotificationQueueFullError(Exception):
+    """
+    Levée quand la file d'envoi est pleine.
+    """
+
+
+@dataclass
+class Notification:
+    id: str
+    channel: str
+    recipient: str
+    code: str
+    status: DeliveryStatus = DeliveryStatus.QUEUED
+    attempts: int = 0
+    last_error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        # Le code n'est jamais exposé
+        return {
+            "notification_id": self.id,
+            "channel": self.channel,
+            "status": self.status.value,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def _provider(name: str, send: Callable[[str, str], Awaitable]) -> Provider:
+    return Provider(
+        name=name,
+        send=send,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.notifier_failure_threshold,
+            reset_timeout=settings.notifier_reset_timeout_seconds,
+        ),
+        latency=LatencyTracker(
+            multiplier=settings.notifier_timeout_multiplier,
+            min_timeout=settings.notifier_timeout_min_seconds,
+            max_timeout=settings.notifier_timeout_max_seconds,
+        ),
+    )
+
+
+async def _send_email_fallback(recipient: str, code: str) -> None:
+    await send_verification_email(recipient, code, pool=smtp_fallback_pool)
+
+
+def _build_notifiers() -> Dict[str, ChannelNotifier]:
+    email_providers = [_provider("smtp", send_verification_email)]
+    if smtp_fallback_pool is not None:
+        email_providers.append(_provider("smtp_fallback", _send_email_fallback))
+
+    whatsapp_providers = [_provider("twilio_whatsapp", send_whatsapp_code)]
+    if settings.twilio_sms_from:
+        whatsapp_providers.append(_provider("twilio_sms", send_sms_code))
+
+    return {
+        "email": ChannelNotifier("email", email_providers, hedging=settings.notifier_hedging),
+        "whatsapp": ChannelNotifier("whatsapp", whatsapp_providers, hedging=settings.notifier_hedging),
+    }
+
+
+# Envoi par canal, avec disjoncteurs et bascule vers le fournisseur de secours
+notifiers = _build_notifiers()
+SENDERS: Dict[str, Callable[[str, str], Awaitable]] = {
+    channel: notifier.send for channel, notifier in notifiers.items()
+}
+
+
+def retry_delay(attempt: int, base: float, cap: float = 60.0) -> float:
+    """
+    Backoff exponentiel avec jitter complet.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class NotificationBackend(ABC):
+    """
+    File d'envoi des notifications : les endpoints enregistrent le code,
+    mettent l'envoi en file et répondent sans attendre le fournisseur.
+    """
+
+    async def start(self) -> None:
+        """Démarrer les workers (si nécessaire)."""
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Vider la file puis arrêter les workers."""
+
+    @abstractmethod
+    async def enqueue(self, channel: str, recipient: str, code: str) -> Notification:
+        """Mettre un envoi en file. Un envoi encore en attente pour le même
+        destinataire est réutilisé avec le nouveau code, ou remplacé."""
+
+    @abstractmethod
+    async def status(self, notification_id: str) -> Optional[Notification]:
+        """Retourner l'état de livraison d'une notification."""
+
+
+class AsyncioNotificationBackend(NotificationBackend):
+    """
+    File asyncio en mémoire du processus, avec retry et déduplication
+    par destinataire.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        queue_size: int = 10_000,
+        max_attempts: int = 5,
+        retry_base: float = 1.0,
+        status_retention: int = 10_000,
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.status_retention = status_retention
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._notifications: "OrderedDict[str, Notification]" = OrderedDict()
+        # Envois pas encore partis, par (canal, destinataire)
+        self._pending: Dict[Tuple[str, str], Notification] = {}
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    async def start(self) -> None:
+        queue = self._get_queue()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker(queue)) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Arrêt avec %d notifications non envoyées", self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _remember(self, notification: Notification) -> None:
+        self._notifications[notification.id] = notification
+        while len(self._notifications) > self.status_retention:
+            self._notifications.popitem(last=False)
+
+    async def enqueue(self, channel: str, recipient: str, code: str) -> Notification:
+        if channel not in SENDERS:
+            raise ValueError(f"Canal de notification inconnu: {channel}")
+
+        key = (channel, recipient)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Déduplication : on remplace le code de l'envoi en attente
+            pending.code = code
+            pending.updated_at = time.time()
+            return pending
+
+        notification = Notification(id=secrets.token_hex(12), channel=channel, recipient=recipient, code=code)
+        try:
+            self._get_queue().put_nowait(notification)
+        except asyncio.QueueFull:
+            raise NotificationQueueFullError("File d'envoi pleine")
+
+        self._pending[key] = notification
+        self._remember(notification)
+        return notification
+
+    async def status(self, notification_id: str) -> Optional[Notification]:
+        return self._notifications.get(notification_id)
+
+    def _set_status(self, notification: Notification, status: DeliveryStatus, error: Optional[str] = None) -> None:
+        notification.status = status
+        notification.last_error = error
+        notification.updated_at = time.time()
+
+    async def _deliver(self, notification: Notification) -> None:
+        key = (notification.channel, notification.recipient)
+        sender = SENDERS[notification.channel]
+
+        while True:
+            # À partir d'ici, un nouvel enqueue crée un nouvel envoi
+            self._pending.pop(key, None)
+            self._set_status(notification, DeliveryStatus.SENDING)
+            notification.attempts += 1
+            try:
+                await sender(notification.recipient, notification.code)
+                self._set_status(notification, DeliveryStatus.SENT)
+                return
+            except Exception as e:
+                if notification.attempts >= self.max_attempts:
+                    logger.error("Échec définitif d'envoi %s à %s: %s", notification.channel, notification.recipient, e)
+                    self._set_status(notification, DeliveryStatus.FAILED, str(e))
+                    return
+
+                self._set_status(notification, DeliveryStatus.RETRYING, str(e))
+                # Pendant l'attente, un nouvel enqueue met à jour le code de cet envoi
+                if key not in self._pending:
+                    self._pending[key] = notification
+                await asyncio.sleep(retry_delay(notification.attempts - 1, self.retry_base))
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            notification = await queue.get()
+            try:
+                await self._deliver(notification)
+            except Exception:
+                logger.exception("Erreur inattendue du worker de notifications")
+            finally:
+                queue.task_done()
+
+
+class CeleryNotificationBackend(NotificationBackend):
+    """
+    Envoi délégué à des workers Celery (voir app/tasks.py).
+    """
+
+    _STATES = {
+        "PENDING": DeliveryStatus.QUEUED,
+        "RECEIVED": DeliveryStatus.QUEUED,
+        "STARTED": DeliveryStatus.SENDING,
+        "RETRY": DeliveryStatus.RETRYING,
+        "SUCCESS": DeliveryStatus.SENT,
+        "FAILURE": DeliveryStatus.FAILED,
+    }
+
+    def __init__(self, status_retention: int = 10_000):
+        from app.tasks import celery_app, deliver_notification
+
+        self.celery_app = celery_app
+        self.task = deliver_notification
+        self.status_retention = status_retention
+        self._notifications: "OrderedDict[str, Notification]" = OrderedDict()
+        self._last_by_recipient: Dict[Tuple[str, str], str] = {}
+
+    async def enqueue(self, channel: str, recipient: str, code: str) -> Notification:
+        if channel not in SENDERS:
+            raise ValueError(f"Canal de notification inconnu: {channel}")
+
+        # Déduplication : une tâche du destinataire pas encore démarrée porte
+        # un code périmé ; elle est révoquée et remplacée par la nouvelle
+        previous_id = self._last_by_recipient.get((channel, recipient))
+        if previous_id:
+            previous = await self.status(previous_id)
+            if previous and previous.status == DeliveryStatus.QUEUED:
+                await self._revoke(previous)
+
+        result = await asyncio.to_thread(self.task.delay, channel, recipient, code)
+        notification = Notification(id=result.id, channel=channel, recipient=recipient, code=code)
+        self._last_by_recipient[(channel, recipient)] = notification.id
+        self._notifications[notification.id] = notification
+        while len(self._notifications) > self.status_retention:
+            old = self._notifications.popitem(last=False)[1]
+            if self._last_by_recipient.get((old.channel, old.recipient)) == old.id:
+                del self._last_by_recipient[(old.channel, old.recipient)]
+        return notification
+
+    async def _revoke(self, notification: Notification) -> None:
+        # Sans effet si un worker a déjà pris la tâche : l'ancien code part alors aussi
+        try:
+            await asyncio.to_thread(self.celery_app.control.revoke, notification.id)
+        except Exception as e:
+            logger.warning("Révocation de la notification %s impossible: %s", notification.id, e)
+            return
+        notification.status = DeliveryStatus.REPLACED
+        notification.updated_at = time.time()
+
+    async def status(self, notification_id: str) -> Optional[Notification]:
+        notification = self._notifications.get(notification_id)
+        if notification is None:
+            return None
+        if notification.status == DeliveryStatus.REPLACED:
+            return notification
+        result = self.celery_app.AsyncResult(notification_id)
+        try:
+            state = await asyncio.to_thread(lambda: result.state)
+        except Exception as e:
+            # Pas de result backend (celery_result_backend non configuré) : le
+            # dernier état connu localement est conservé
+            logger.debug("État Celery indisponible pour %s: %s", notification_id, e)
+            return notification
+        notification.status = self._STATES.get(state, notification.status)
+        notification.updated_at = time.time()
+        return notification
+
+
+def create_notification_backend() -> NotificationBackend:
+    """
+    Instancier le backend configuré (`notification_backend`: "asyncio" ou "celery").
+    """
+    if settings.notification_backend == "celery":
+        return CeleryNotificationBackend(status_retention=settings.notification_status_retention)
+    if settings.notification_backend == "asyncio":
+        return AsyncioNotificationBackend(
+            workers=settings.notification_workers,
+            queue_size=settings.notification_queue_size,
+            max_attempts=settings.notification_max_attempts,
+            retry_base=settings.notification_retry_base_seconds,
+            status_retention=settings.notification_status_retention,
+        )
+    raise ValueError(f"Backend de notification inconnu: {settings.notification_backend}")
+
+
+notifications = create_notification_backend()
@@ -0,0 +1,195 @@
+# app/utils/notifier.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """
+    Levée quand tous les fournisseurs d'un canal sont indisponibles (circuit ouvert).
+    """
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : après `failure_threshold` échecs consécutifs, le circuit
+    s'ouvre et les envois échouent immédiatement pendant `reset_timeout`
+    secondes. Un seul envoi de test est ensuite autorisé (semi-ouvert).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Libérer l'envoi de test sans conclure (envoi annulé)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit ouvert après %d échecs", self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """
+    Latences récentes d'un fournisseur, pour en déduire un timeout adapté.
+    """
+
+    def __init__(
+        self,
+        window: int = 100,
+        multiplier: float = 2.0,
+        min_timeout: float = 1.0,
+        max_timeout: float = 15.0,
+        min_samples: int = 10,
+    ):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def timeout(self) -> float:
+        p95 = self.percentile(95)
+        if p95 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p95 * self.multiplier))
+
+
+@dataclass
+class Provider:
+    name: str
+    send: Callable[[str, str], Awaitable]
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    latency: LatencyTracker = field(default_factory=LatencyTracker)
+
+    async def attempt(self, recipient: str, code: str) -> None:
+        """
+        Envoi avec timeout appris, en mettant à jour le disjoncteur.
+        """
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self.send(recipient, code), self.latency.timeout())
+        except asyncio.CancelledError:
+            # Envoi couvert par un autre fournisseur : ni succès ni échec
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.latency.record(time.monotonic() - start)
+        self.breaker.record_success()
+
+
+class ChannelNotifier:
+    """
+    Envoi sur un canal via un ou plusieurs fournisseurs, avec disjoncteur par
+    fournisseur et bascule vers le suivant en cas d'échec. Avec `hedging`, le
+    fournisseur secondaire est lancé en parallèle si le principal dépasse son
+    p95 de latence ; le premier succès l'emporte.
+    """
+
+    def __init__(self, channel: str, providers: List[Provider], hedging: bool = False):
+        self.channel = channel
+        self.providers = providers
+        self.hedging = hedging
+
+    async def send(self, recipient: str, code: str) -> str:
+        """
+        Envoyer le code. Retourne le nom du fournisseur utilisé.
+        """
+        # allow() est évalué au dernier moment : il réserve l'envoi de test
+        # d'un circuit semi-ouvert
+        remaining = iter(self.providers)
+        primary = self._next_available(remaining)
+        if primary is None:
+            raise CircuitOpenError(f"Aucun fournisseur disponible pour le canal {self.channel}")
+
+        if self.hedging:
+            return await self._send_hedged(primary, remaining, recipient, code)
+
+        last_error: Optional[Exception] = None
+        provider = primary
+        while provider is not None:
+            try:
+                await provider.attempt(recipient, code)
+                return provider.name
+            except Exception as e:
+                logger.warning("Échec d'envoi %s via %s: %s", self.channel, provider.name, e)
+                last_error = e
+            provider = self._next_available(remaining)
+        raise last_error
+
+    @staticmethod
+    def _next_available(providers) -> Optional[Provider]:
+        for provider in providers:
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    async def _send_hedged(self, primary: Provider, remaining, recipient: str, code: str) -> str:
+        tasks = {asyncio.create_task(primary.attempt(recipient, code)): primary}
+        hedge_delay = primary.latency.percentile(95) or primary.latency.timeout()
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+            if not done or next(iter(done)).exception() is not None:
+                secondary = self._next_available(remaining)
+                if secondary is not None:
+                    tasks[asyncio.create_task(secondary.attempt(recipient, code))] = secondary
+
+            last_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return tasks[task].name
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
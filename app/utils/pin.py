@@ -3,57 +3,62 @@
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 from fastapi import HTTPException
-from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 import jwt
 import secrets
-from typing import Optional
-
-# Configuration JWT
-SECRET_KEY = "your-secret-key-here"  # À garder secret en production
-ALGORITHM = "HS256"
+from typing import Any, Dict, Optional, Tuple
+from app.utils.hashing import hasher
+from app.models.views import AuthView, ProfileView
+from app.crud.user import get_user_by_id, update_user, update_user_pin
+from app.config import settings
+from app.utils.keyring import keyring
+
+# Configuration JWT (clés de signature : voir app/utils/keyring.py)
 ACCESS_TOKEN_EXPIRE_MINUTES = 10000
 
-# Création du contexte pour hasher les PINs
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # --- Fonctions utilitaires ---
-async def set_user_pin(db: AsyncIOMotorDatabase, user_id: str, pin: str) -> str:
+async def set_user_pin(db: AsyncIOMotorDatabase, user_id: str, pin: str) -> Tuple[str, ProfileView]:
     """
     Définit ou met à jour le PIN de l'utilisateur et génère un token de connexion.
-    Retourne le token JWT généré.
+    Retourne le token JWT généré et le profil mis à jour.
     """
-    hashed_pin = pwd_context.hash(pin)
+    hashed_pin = await hasher.hash(pin)
     
-    # Mise à jour du PIN dans la base de données
-    result = await db.users.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"pin": hashed_pin, "pin_created_at": datetime.now(timezone.utc)}}
-    )
-
-    if result.matched_count == 0:
+    # Mise à jour du PIN et lecture du profil en un seul aller-retour
+    user = await update_user_pin(db, user_id, hashed_pin)
+    if not user:
         raise HTTPException(status_code=404, detail="Utilisateur introuvable")
     
     # Génération du token de connexion
     access_token = create_access_token(user_id)
-    print(f"[DEBUG] Token généré (set_user_pin): {access_token}")  # 🔥 LOG ICI
     
-    return access_token
+    return access_token, user
 
 
-async def verify_user_pin(db: AsyncIOMotorDatabase, user_id: str, pin: str) -> Optional[str]:
+async def verify_user_pin(
+    db: AsyncIOMotorDatabase,
+    user_id: str,
+    pin: str,
+    user: Optional[AuthView] = None
+) -> Optional[str]:
     """
     Vérifie si le PIN fourni est correct.
+    `user` évite de relire l'utilisateur s'il a déjà été chargé.
     Retourne un token JWT si la vérification réussit, None sinon.
     """
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
-    if not user or "pin" not in user:
+    if user is None:
+        user = await get_user_by_id(db, user_id, AuthView)
+    if not user or not user.pin:
         return None
 
-    if pwd_context.verify(pin, user["pin"]):
+    is_valid, new_hash = await hasher.verify_and_update(pin, user.pin)
+    if is_valid:
+        # Re-hachage transparent si le coût ou le schéma est obsolète
+        if new_hash:
+            await update_user(db, user_id, {"pin": new_hash})
+
         # PIN correct, génération du token
         access_token = create_access_token(user_id)
-        print(f"[DEBUG] Token généré (verify_user_pin): {access_token}")  # 🔥 LOG ICI
         return access_token
     
     return None
@@ -75,6 +80,7 @@ def create_access_token(
     
     to_encode = {
         "sub": user_id,              # Subject (ID utilisateur)
+        "typ": "access",             # Type de token
         "exp": expire,               # Expiration
         "iat": datetime.now(timezone.utc),  # Issued at
         "jti": secrets.token_hex(16)        # JWT ID unique
@@ -86,22 +92,58 @@ def create_access_token(
     if phone:
         to_encode["phone"] = phone
     
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = keyring.sign(to_encode)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Vérifie la signature et l'expiration d'un token d'accès et retourne ses claims.
+    """
+    try:
+        payload = keyring.decode(token, allow_legacy=True, options={"require": ["exp"]})
+    except jwt.PyJWTError:
+        return None
+    # Refuser les autres types de tokens (ex: preuves de vérification), y
+    # compris les tokens sans `typ`
+    if payload.get("typ") != "access" or payload.get("sub") is None:
+        return None
+    return payload
+
+
 def verify_access_token(token: str) -> Optional[str]:
     """
     Vérifie la validité d'un token JWT et retourne l'ID utilisateur.
     """
+    payload = decode_access_token(token)
+    return payload["sub"] if payload else None
+
+
+def create_verification_proof(channel: str, recipient: str) -> str:
+    """
+    Crée une preuve signée et de courte durée attestant que `recipient`
+    (email ou téléphone) a été vérifié sur le canal `channel`.
+    """
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "sub": recipient,
+        "typ": f"{channel}_verification",
+        "exp": now + timedelta(seconds=settings.verification_proof_ttl_seconds),
+        "iat": now,
+        "jti": secrets.token_hex(16)
+    }
+    return keyring.sign(to_encode)
+
+
+def verify_verification_proof(token: str, channel: str, recipient: str) -> bool:
+    """
+    Vérifie localement une preuve de vérification (sans état partagé ni accès DB).
+    """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-        return user_id
+        payload = keyring.decode(token)
     except jwt.PyJWTError:
-        return None
+        return False
+    return payload.get("typ") == f"{channel}_verification" and payload.get("sub") == recipient
 
 
 # async def authenticate_with_pin(db: AsyncIOMotorDatabase, user_id: str, pin: str) -> dict:
@@ -116,7 +158,6 @@ def verify_access_token(token: str) -> Optional[str]:
 #             detail="PIN incorrect ou utilisateur introuvable"
 #         )
     
-#     print(f"[DEBUG] Token retourné (authenticate_with_pin): {token}")  # 🔥 LOG ICI
     
 #     return {
 #         "access_token": token,
@@ -140,5 +181,4 @@ def verify_access_token(token: str) -> Optional[str]:
     
 #     # Générer un nouveau token
 #     new_token = create_access_token(user_id)
-#     print(f"[DEBUG] Nouveau token généré (refresh_token): {new_token}")  # 🔥 LOG ICI
 #     return new_token
@@ -0,0 +1,190 @@
+# app/utils/rate_limit.py
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.utils.metrics import Counter, registry, span
+
+rate_limited = registry.register(Counter(
+    "rate_limited_total", "Tentatives refusées par la limitation de débit, avant hachage.", ("scope",)
+))
+
+# Ordre de vérification : l'IP d'abord, pour qu'un client déjà bloqué
+# n'épuise pas le seau du compte qu'il vise (backend mémoire)
+SCOPES = ("ip", "device", "account")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Seau à jetons : `burst` tentatives d'affilée, puis `per_minute` par minute.
+    """
+    burst: int
+    per_minute: float
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+    def retry_after(self, tokens: float) -> float:
+        return (1 - tokens) / self.per_second
+
+
+def client_ip(request: Request, trusted_proxy_hops: int = 0) -> Optional[str]:
+    """
+    Adresse du client. Derrière `trusted_proxy_hops` proxys de confiance,
+    l'adresse est l'entrée de X-Forwarded-For ajoutée par le premier d'entre
+    eux (la N-ième en partant de la droite) : les entrées plus à gauche sont
+    fournies par le client et ne sont pas fiables.
+    """
+    if trusted_proxy_hops > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+        if len(forwarded) >= trusted_proxy_hops:
+            return forwarded[-trusted_proxy_hops]
+    return request.client.host if request.client else None
+
+
+class RateLimiter(ABC):
+    """
+    Limitation des tentatives d'authentification par IP, appareil et compte,
+    vérifiée avant tout hachage pour protéger le pool bcrypt.
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit]):
+        self.limits = limits
+
+    async def ensure_indexes(self) -> None:
+        """Créer les index nécessaires au backend (rien par défaut)."""
+
+    async def hit(self, **keys: Optional[str]) -> float:
+        """
+        Consommer une tentative pour chaque clé fournie (ip=, device=, account=).
+        Retourne 0 si la requête passe, sinon le délai d'attente en secondes.
+        """
+        for scope in SCOPES:
+            key = keys.get(scope)
+            if not key or scope not in self.limits:
+                continue
+            retry_after = await self.take(scope, key, self.limits[scope])
+            if retry_after > 0:
+                rate_limited.inc(scope)
+                return retry_after
+        return 0.0
+
+    @abstractmethod
+    async def take(self, scope: str, key: str, limit: RateLimit) -> float:
+        """Prendre un jeton ; retourne 0 ou le délai avant le prochain jeton."""
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Seaux en mémoire du processus (un jeu par worker), table bornée à
+    `max_keys` : les clés inactives depuis le plus longtemps, donc les seaux
+    les plus probablement pleins, sont évincées en premier.
+    """
+
+    def __init__(self, limits: Dict[str, RateLimit], max_keys: int = 100_000):
+        super().__init__(limits)
+        self.max_keys = max_keys
+        # (scope, clé) -> (jetons, horodatage monotone)
+        self._buckets: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, scope: str, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        bucket_key = (scope, key)
+        bucket = self._buckets.pop(bucket_key, None)
+        if bucket is None:
+            tokens = float(limit.burst)
+        else:
+            tokens, updated_at = bucket
+            tokens = min(limit.burst, tokens + (now - updated_at) * limit.per_second)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[bucket_key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return 0.0 if allowed else limit.retry_after(tokens)
+
+
+class MongoRateLimiter(RateLimiter):
+    """
+    Seaux partagés entre workers dans MongoDB : un document par clé, mis à
+    jour en un seul findAndModify (pipeline) sur l'horloge du serveur.
+    Les clés sont vérifiées en parallèle (un aller-retour de latence).
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, limits: Dict[str, RateLimit], collection: str = "rate_limits"):
+        super().__init__(limits)
+        self.collection = db[collection]
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def hit(self, **keys: Optional[str]) -> float:
+        scopes = [scope for scope in SCOPES if keys.get(scope) and scope in self.limits]
+        results = await asyncio.gather(*(self.take(scope, keys[scope], self.limits[scope]) for scope in scopes))
+        retry_after = 0.0
+        for scope, result in zip(scopes, results):
+            if result > 0:
+                rate_limited.inc(scope)
+                retry_after = max(retry_after, result)
+        return retry_after
+
+    async def take(self, scope: str, key: str, limit: RateLimit) -> float:
+        # Un seau non touché pendant le temps d'un remplissage complet est
+        # plein : le document peut expirer
+        refill_ms = limit.burst / limit.per_second * 1000
+        elapsed_ms = {"$subtract": ["$$NOW", {"$ifNull": ["$updated_at", "$$NOW"]}]}
+        with span("mongo", "rate_limit"):
+            doc = await self.collection.find_one_and_update(
+                {"_id": f"{scope}:{key}"},
+                [
+                    {"$set": {
+                        "tokens": {"$min": [
+                            limit.burst,
+                            {"$add": [
+                                {"$ifNull": ["$tokens", limit.burst]},
+                                {"$multiply": [elapsed_ms, limit.per_second / 1000]},
+                            ]},
+                        ]},
+                        "updated_at": "$$NOW",
+                        "expires_at": {"$add": ["$$NOW", refill_ms]},
+                    }},
+                    {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                    {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+                ],
+                projection={"tokens": 1, "allowed": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        return 0.0 if doc["allowed"] else limit.retry_after(doc["tokens"])
+
+
+def create_rate_limiter(db: AsyncIOMotorDatabase) -> Optional[RateLimiter]:
+    """
+    Instancier le backend configuré (`rate_limit_backend`: "memory" ou "mongo"),
+    ou None si la limitation est désactivée.
+    """
+    if not settings.rate_limit_enabled:
+        return None
+    limits = {
+        "ip": RateLimit(settings.rate_limit_ip_burst, settings.rate_limit_ip_per_minute),
+        "device": RateLimit(settings.rate_limit_device_burst, settings.rate_limit_device_per_minute),
+        "account": RateLimit(settings.rate_limit_account_burst, settings.rate_limit_account_per_minute),
+    }
+    if settings.rate_limit_backend == "mongo":
+        return MongoRateLimiter(db, limits)
+    if settings.rate_limit_backend == "memory":
+        return MemoryRateLimiter(limits, max_keys=settings.rate_limit_max_keys)
+    raise ValueError(f"Backend de limitation inconnu: {settings.rate_limit_backend}")
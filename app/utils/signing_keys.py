@@ -0,0 +1,39 @@
+# app/utils/signing_keys.py
+# Fichiers de clés privées, sans charger le trousseau (utilisable avant
+# qu'aucune clé n'existe, ex: app/scripts/generate_jwt_key.py)
+
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    raise ValueError(f"Algorithme de signature non pris en charge: {algorithm}")
+
+
+def load_private_key(path: Path, algorithm: str):
+    key = serialization.load_pem_private_key(path.read_bytes(), password=None)
+    expected = ed25519.Ed25519PrivateKey if algorithm == "EdDSA" else ec.EllipticCurvePrivateKey
+    if not isinstance(key, expected):
+        raise ValueError(f"La clé {path.name} ne correspond pas à l'algorithme {algorithm}")
+    return key
+
+
+def generate_key_file(directory: str, kid: str, algorithm: str) -> Path:
+    """
+    Écrire une nouvelle clé privée PEM (utilisé pour la rotation).
+    """
+    path = Path(directory) / f"{kid}.pem"
+    pem = generate_private_key(algorithm).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    path.write_bytes(pem)
+    path.chmod(0o600)
+    return path
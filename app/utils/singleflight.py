@@ -0,0 +1,43 @@
+# app/utils/singleflight.py
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Regroupe les appels concurrents portant sur la même clé : un seul
+    appel est exécuté, les autres attendent et partagent son résultat.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Exécuter `fn` pour `key`, ou attendre l'appel déjà en cours.
+        Retourne (résultat, partagé).
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            # shield : l'annulation d'un appelant n'annule pas l'appel partagé
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Marquer l'exception comme récupérée
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
@@ -0,0 +1,208 @@
+# app/utils/smtp_pool.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from functools import lru_cache
+from typing import TYPE_CHECKING, Deque, Iterable, Optional, Set, Tuple
+
+from app.utils.metrics import span
+
+if TYPE_CHECKING:
+    import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+# aiosmtplib n'est importé qu'au premier envoi (démarrage des workers plus rapide)
+@lru_cache(maxsize=1)
+def reconnect_errors() -> Tuple[type, ...]:
+    """
+    Erreurs après lesquelles la connexion est jetée et l'envoi retenté.
+    """
+    import aiosmtplib
+
+    return (
+        aiosmtplib.SMTPServerDisconnected,
+        aiosmtplib.SMTPConnectError,
+        aiosmtplib.SMTPTimeoutError,
+        ConnectionError,
+        OSError,
+    )
+
+
+def discard_errors() -> Tuple[type, ...]:
+    """
+    Erreurs après lesquelles la connexion est dans un état inconnu et doit être jetée.
+    """
+    return reconnect_errors() + (asyncio.CancelledError,)
+
+
+@dataclass
+class PooledConnection:
+    client: "aiosmtplib.SMTP"
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    messages_sent: int = 0
+
+
+class SMTPConnectionPool:
+    """
+    Pool de connexions SMTP persistantes : STARTTLS et AUTH ne sont payés
+    qu'une fois par connexion au lieu d'une fois par message.
+    Les connexions inactives depuis plus de `keepalive` secondes sont
+    vérifiées par un NOOP avant réutilisation.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: bool = True,
+        size: int = 4,
+        keepalive: float = 30.0,
+        timeout: float = 10.0,
+        max_messages_per_connection: int = 100,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle: Deque[PooledConnection] = deque()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Fermetures en arrière-plan (référence gardée jusqu'à la fin de la tâche)
+        self._closing: Set[asyncio.Task] = set()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        return self._semaphore
+
+    async def _connect(self) -> PooledConnection:
+        import aiosmtplib
+
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return PooledConnection(client=client)
+
+    async def _close(self, conn: PooledConnection) -> None:
+        try:
+            await conn.client.quit()
+        except Exception:
+            conn.client.close()
+
+    async def _checkout(self) -> PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()  # LIFO : la connexion la plus récente est la plus sûre
+            if not conn.client.is_connected:
+                continue
+            if time.monotonic() - conn.last_used > self.keepalive:
+                try:
+                    await conn.client.noop()
+                except reconnect_errors():
+                    conn.client.close()
+                    continue
+            return conn
+        return await self._connect()
+
+    def _checkin(self, conn: PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        if conn.messages_sent >= self.max_messages_per_connection:
+            task = asyncio.ensure_future(self._close(conn))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            self._idle.append(conn)
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Emprunter une connexion du pool. Elle est jetée si une erreur réseau survient.
+        """
+        async with self._get_semaphore():
+            conn = await self._checkout()
+            try:
+                yield conn
+            except discard_errors():
+                conn.client.close()
+                raise
+            except BaseException:
+                self._checkin(conn)
+                raise
+            else:
+                self._checkin(conn)
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Envoyer un message, avec une nouvelle tentative sur une connexion
+        fraîche si la connexion réutilisée était morte.
+        """
+        for attempt in range(2):
+            try:
+                with span("smtp", "send"):
+                    async with self.connection() as conn:
+                        await conn.client.send_message(message)
+                        conn.messages_sent += 1
+                return
+            except reconnect_errors():
+                if attempt:
+                    raise
+                logger.warning("Connexion SMTP perdue, reconnexion")
+
+    async def send_many(self, messages: Iterable[EmailMessage]) -> None:
+        """
+        Envoyer plusieurs messages en les répartissant sur jusqu'à `size`
+        connexions en parallèle. Sur une connexion, les messages partent
+        l'un après l'autre (aiosmtplib ne pipeline pas les commandes) mais
+        sans refaire STARTTLS ni AUTH.
+        """
+        pending: Deque[EmailMessage] = deque(messages)
+
+        async def drain() -> None:
+            while pending:
+                async with self.connection() as conn:
+                    while pending and conn.messages_sent < self.max_messages_per_connection:
+                        await conn.client.send_message(pending.popleft())
+                        conn.messages_sent += 1
+
+        await asyncio.gather(*(drain() for _ in range(min(self.size, len(pending)))))
+
+    async def warm_up(self, connections: int = 1) -> None:
+        """
+        Ouvrir des connexions (TLS et AUTH compris) avant les premiers envois.
+        """
+        opened = await asyncio.gather(
+            *(self._connect() for _ in range(min(connections, self.size))),
+            return_exceptions=True
+        )
+        self._idle.extend(conn for conn in opened if isinstance(conn, PooledConnection))
+        errors = [conn for conn in opened if isinstance(conn, BaseException)]
+        if errors:
+            raise errors[0]
+
+    async def close(self) -> None:
+        """
+        Fermer proprement toutes les connexions inactives.
+        """
+        while self._idle:
+            await self._close(self._idle.pop())
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
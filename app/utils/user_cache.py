@@ -0,0 +1,235 @@
+# app/utils/user_cache.py
+
+import asyncio
+import logging
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from app.config import settings
+from app.db import raw_db
+
+logger = logging.getLogger(__name__)
+
+# Champs indexés en plus de l'_id
+LOOKUP_FIELDS = ("email", "phone")
+
+# Écritures qui ne rendent pas l'entrée obsolète pour les autres workers
+NON_INVALIDATING_FIELDS = {"last_login", "updated_at"}
+
+
+class UserCache:
+    """
+    Cache en mémoire des documents utilisateurs (projection de connexion),
+    accessible par _id, email et téléphone, avec TTL et éviction LRU.
+    `max_size=0` désactive le cache.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        # user_id -> (expire_at, document, clés d'index)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], List[Tuple[str, str]]]]" = OrderedDict()
+        self._index: Dict[Tuple[str, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, field: str, value: str) -> Optional[Dict[str, Any]]:
+        """
+        Lire un utilisateur par `field` ("_id", "email" ou "phone").
+        """
+        user_id = value if field == "_id" else self._index.get((field, value))
+        entry = self._entries.get(user_id) if user_id is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expire_at, doc, _ = entry
+        if expire_at <= time.monotonic():
+            self._remove(user_id)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return dict(doc)
+
+    def put(self, doc: Dict[str, Any], field: Optional[str] = None, value: Optional[str] = None) -> None:
+        """
+        Mettre en cache un document. (`field`, `value`) ajoute la clé de
+        recherche utilisée si elle diffère de la valeur stockée.
+        """
+        if not self.max_size:
+            return
+        user_id = str(doc["_id"])
+        self._remove(user_id)
+
+        keys = [(name, doc[name]) for name in LOOKUP_FIELDS if doc.get(name)]
+        if field and field != "_id" and (field, value) not in keys:
+            keys.append((field, value))
+        for key in keys:
+            self._index[key] = user_id
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, dict(doc), keys)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def patch(self, user_id: str, fields: Dict[str, Any]) -> None:
+        """
+        Mettre à jour en place des champs non sensibles (ex: last_login).
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry[1].update(fields)
+
+    def invalidate(self, user_id: str) -> None:
+        if self._remove(user_id):
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._index.clear()
+
+    def _remove(self, user_id: str) -> bool:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        for key in entry[2]:
+            if self._index.get(key) == user_id:
+                del self._index[key]
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+class CacheInvalidationChannel:
+    """
+    Propagation des invalidations entre workers :
+    - "capped" : collection plafonnée lue par un curseur tailable ;
+    - "change_stream" : change stream sur la collection users (replica set requis).
+    Le cache contient les hashes du mot de passe et du PIN : sans canal, un
+    ancien secret resterait valide sur les autres workers jusqu'au TTL, d'où
+    le refus de démarrer en mode "off" quand le cache est actif.
+    """
+
+    def __init__(self, cache: UserCache, db, mode: str = "off", collection: str = "cache_invalidations"):
+        self.cache = cache
+        self.db = db
+        self.mode = mode
+        self.collection_name = collection
+        self.origin = secrets.token_hex(8)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if not self.cache.max_size:
+            # Cache désactivé : rien à invalider
+            self.mode = "off"
+            return
+        if self.mode == "off":
+            raise ValueError(
+                "user_cache_invalidation doit valoir \"capped\" ou \"change_stream\" "
+                "quand le cache des utilisateurs est actif (user_cache_max_size > 0)"
+            )
+        if self.mode == "capped":
+            try:
+                await self.db.create_collection(self.collection_name, capped=True, size=1024 * 1024)
+            except CollectionInvalid:
+                pass  # Déjà créée
+            self._task = asyncio.create_task(self._tail())
+        elif self.mode == "change_stream":
+            self._task = asyncio.create_task(self._watch())
+        elif self.mode != "off":
+            raise ValueError(f"Mode d'invalidation inconnu: {self.mode}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, user_id: str) -> None:
+        """
+        Annoncer une invalidation aux autres workers, avant que l'écriture
+        ne soit confirmée au client.
+        """
+        if self.mode != "capped":
+            return
+        try:
+            await self.db[self.collection_name].insert_one(
+                {"user_id": user_id, "origin": self.origin, "at": datetime.utcnow()}
+            )
+        except Exception:
+            logger.exception("Échec de publication d'invalidation du cache")
+
+    async def _tail(self) -> None:
+        collection = self.db[self.collection_name]
+        last = await collection.find_one(sort=[("$natural", -1)], projection={"_id": 1})
+        last_id = last["_id"] if last else None
+        while True:
+            try:
+                query = {"_id": {"$gt": last_id}} if last_id else {}
+                cursor = collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                async for doc in cursor:
+                    last_id = doc["_id"]
+                    if doc.get("origin") != self.origin:
+                        self.cache.invalidate(doc["user_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Erreur du canal d'invalidation du cache")
+                # Des invalidations ont pu être manquées
+                self.cache.clear()
+            # Curseur mort (collection vide ou erreur) : on le recrée
+            await asyncio.sleep(1)
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+        while True:
+            try:
+                async with self.db.users.watch(pipeline) as stream:
+                    async for change in stream:
+                        updated = change.get("updateDescription", {}).get("updatedFields", {})
+                        if change["operationType"] == "update" and set(updated) <= NON_INVALIDATING_FIELDS:
+                            continue
+                        self.cache.invalidate(str(change["documentKey"]["_id"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Erreur du change stream d'invalidation du cache")
+                # Par prudence, on vide le cache pendant la reconnexion
+                self.cache.clear()
+                await asyncio.sleep(1)
+
+
+user_cache = UserCache(max_size=settings.user_cache_max_size, ttl=settings.user_cache_ttl_seconds)
+invalidation_channel = CacheInvalidationChannel(user_cache, raw_db, mode=settings.user_cache_invalidation)
+
+
+async def invalidate_user(user_id: str) -> None:
+    """
+    Invalider un utilisateur localement et dans les autres workers.
+    """
+    user_cache.invalidate(user_id)
+    await invalidation_channel.publish(user_id)
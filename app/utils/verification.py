@@ -0,0 +1,228 @@
+# app/utils/verification.py
+
+import heapq
+import hmac
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.config import settings
+
+
+class CheckResult(str, Enum):
+    """
+    Résultat de la vérification d'un code.
+    """
+    OK = "ok"
+    MISSING = "missing"
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    TOO_MANY_ATTEMPTS = "too_many_attempts"
+
+
+@dataclass
+class CodeEntry:
+    code: str
+    expires_at: float  # Timestamp epoch (secondes)
+    created_at: float
+    attempts: int = 0
+
+
+class VerificationStore(ABC):
+    """
+    Stockage des codes de vérification, avec expiration et compteur de tentatives.
+    L'état « vérifié » n'est pas stocké : il est porté par une preuve signée
+    (voir `create_verification_proof` dans app/utils/pin.py).
+    """
+
+    def __init__(self, code_ttl: int, max_attempts: int):
+        self.code_ttl = code_ttl
+        self.max_attempts = max_attempts
+
+    async def ensure_indexes(self) -> None:
+        """Créer les index nécessaires au backend (rien par défaut)."""
+
+    @abstractmethod
+    async def put_code(self, channel: str, recipient: str, code: str) -> CodeEntry:
+        """Enregistrer un nouveau code (remplace le précédent)."""
+
+    @abstractmethod
+    async def get_code(self, channel: str, recipient: str) -> Optional[CodeEntry]:
+        """Retourner le code en cours de validité, ou None."""
+
+    @abstractmethod
+    async def check_code(self, channel: str, recipient: str, code: str) -> CheckResult:
+        """Vérifier un code. Le code est consommé en cas de succès."""
+
+
+def _codes_match(expected: str, given: str) -> bool:
+    return hmac.compare_digest(expected.encode(), given.encode())
+
+
+class MemoryVerificationStore(VerificationStore):
+    """
+    Backend en mémoire du processus : expiration par tas (heap) et taille bornée.
+    Quand la limite est atteinte, l'entrée la plus proche de l'expiration est évincée.
+    """
+
+    def __init__(self, code_ttl: int, max_attempts: int, max_entries: int = 100_000):
+        super().__init__(code_ttl, max_attempts)
+        self.max_entries = max_entries
+        self._codes: Dict[Tuple[str, str], CodeEntry] = {}
+        # (expires_at, clé) — les entrées obsolètes sont ignorées à l'éviction
+        self._heap: List[Tuple[float, Tuple[str, str]]] = []
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _expiry(self, key: Tuple[str, str]) -> Optional[float]:
+        entry = self._codes.get(key)
+        return entry.expires_at if entry else None
+
+    def _pop_heap(self) -> None:
+        expires_at, key = heapq.heappop(self._heap)
+        # Ne supprimer que si l'entrée n'a pas été remplacée entre-temps
+        if self._expiry(key) == expires_at:
+            del self._codes[key]
+
+    def _evict(self, now: float) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            self._pop_heap()
+        while self._heap and len(self) >= self.max_entries:
+            self._pop_heap()
+        # Le tas peut accumuler des entrées obsolètes : le reconstruire si besoin
+        if len(self._heap) > 2 * self.max_entries:
+            self._heap = [(exp, key) for exp, key in self._heap if self._expiry(key) == exp]
+            heapq.heapify(self._heap)
+
+    async def put_code(self, channel: str, recipient: str, code: str) -> CodeEntry:
+        now = time.time()
+        self._evict(now)
+        entry = CodeEntry(code=code, expires_at=now + self.code_ttl, created_at=now)
+        self._codes[(channel, recipient)] = entry
+        heapq.heappush(self._heap, (entry.expires_at, (channel, recipient)))
+        return entry
+
+    async def get_code(self, channel: str, recipient: str) -> Optional[CodeEntry]:
+        entry = self._codes.get((channel, recipient))
+        if entry is None or entry.expires_at <= time.time():
+            return None
+        return entry
+
+    async def check_code(self, channel: str, recipient: str, code: str) -> CheckResult:
+        key = (channel, recipient)
+        entry = self._codes.get(key)
+        if entry is None:
+            return CheckResult.MISSING
+
+        if entry.expires_at <= time.time():
+            del self._codes[key]
+            return CheckResult.EXPIRED
+
+        entry.attempts += 1
+        if entry.attempts > self.max_attempts:
+            del self._codes[key]
+            return CheckResult.TOO_MANY_ATTEMPTS
+
+        if not _codes_match(entry.code, code):
+            return CheckResult.INVALID
+
+        del self._codes[key]
+        return CheckResult.OK
+
+
+class MongoVerificationStore(VerificationStore):
+    """
+    Backend MongoDB partagé entre workers, sur une collection avec index TTL.
+    Le TTL de MongoDB étant appliqué en différé, l'expiration est aussi
+    vérifiée dans chaque requête.
+    """
+
+    def __init__(
+        self,
+        db: AsyncIOMotorDatabase,
+        code_ttl: int,
+        max_attempts: int,
+        collection: str = "verification_codes",
+    ):
+        super().__init__(code_ttl, max_attempts)
+        self.collection = db[collection]
+
+    @staticmethod
+    def _id(channel: str, recipient: str) -> str:
+        return f"{channel}:{recipient}"
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def put_code(self, channel: str, recipient: str, code: str) -> CodeEntry:
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=self.code_ttl)
+        await self.collection.replace_one(
+            {"_id": self._id(channel, recipient)},
+            {"code": code, "attempts": 0, "created_at": now, "expires_at": expires_at},
+            upsert=True,
+        )
+        return CodeEntry(code=code, expires_at=expires_at.timestamp(), created_at=now.timestamp())
+
+    async def get_code(self, channel: str, recipient: str) -> Optional[CodeEntry]:
+        doc = await self.collection.find_one({
+            "_id": self._id(channel, recipient),
+            "expires_at": {"$gt": datetime.now(timezone.utc)},
+        })
+        if not doc:
+            return None
+        return CodeEntry(
+            code=doc["code"],
+            expires_at=doc["expires_at"].replace(tzinfo=timezone.utc).timestamp(),
+            created_at=doc["created_at"].replace(tzinfo=timezone.utc).timestamp(),
+            attempts=doc.get("attempts", 0),
+        )
+
+    async def check_code(self, channel: str, recipient: str, code: str) -> CheckResult:
+        doc_id = self._id(channel, recipient)
+
+        # Incrément atomique du compteur de tentatives
+        doc = await self.collection.find_one_and_update(
+            {"_id": doc_id},
+            {"$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not doc:
+            return CheckResult.MISSING
+
+        if doc["expires_at"].replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc):
+            await self.collection.delete_one({"_id": doc_id})
+            return CheckResult.EXPIRED
+
+        if doc["attempts"] > self.max_attempts:
+            await self.collection.delete_one({"_id": doc_id})
+            return CheckResult.TOO_MANY_ATTEMPTS
+
+        if not _codes_match(doc["code"], code):
+            return CheckResult.INVALID
+
+        # Consommer le code (un seul worker peut réussir la suppression)
+        result = await self.collection.delete_one({"_id": doc_id, "code": doc["code"]})
+        return CheckResult.OK if result.deleted_count else CheckResult.MISSING
+
+
+def create_verification_store(db: AsyncIOMotorDatabase) -> VerificationStore:
+    """
+    Instancier le backend configuré (`verification_backend`: "memory" ou "mongo").
+    """
+    options = dict(
+        code_ttl=settings.verification_code_ttl_seconds,
+        max_attempts=settings.verification_max_attempts,
+    )
+    if settings.verification_backend == "mongo":
+        return MongoVerificationStore(db, **options)
+    if settings.verification_backend == "memory":
+        return MemoryVerificationStore(max_entries=settings.verification_max_entries, **options)
+    raise ValueError(f"Backend de vérification inconnu: {settings.verification_backend}")
@@ -1,9 +1,21 @@
 # app/utils/whatsapp.py
 
+import asyncio
 import random
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioException
+from typing import TYPE_CHECKING, Optional
+
 from app.config import settings
+from app.utils.metrics import span
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class WhatsAppError(Exception):
+    """
+    Erreur retournée par l'API Twilio.
+    """
+
 
 def generate_code() -> str:
     """
@@ -11,36 +23,149 @@ def generate_code() -> str:
     """
     return f"{random.randint(0, 999999):06d}"
 
-async def send_whatsapp_code(phone: str) -> str:
+
+class WhatsAppClient:
+    """
+    Client asynchrone de l'API REST Twilio (Messages) : un seul client HTTP
+    avec pool de connexions keep-alive, concurrence bornée et timeouts.
+    """
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        from_: str,
+        base_url: str = "https://api.twilio.com",
+        max_connections: int = 20,
+        max_concurrency: int = 50,
+        timeout: float = 10.0,
+    ):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_ = from_
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            # httpx n'est importé qu'au premier envoi
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=(self.account_sid, self.auth_token),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def send_message(self, to: str, body: str, from_: Optional[str] = None, whatsapp: bool = True) -> dict:
+        """
+        Envoyer un message WhatsApp (ou un SMS si `whatsapp` est False).
+        Retourne la ressource Message de Twilio.
+        """
+        import httpx
+
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                with span("twilio", "messages"):
+                    response = await client.post(
+                        f"/2010-04-01/Accounts/{self.account_sid}/Messages.json",
+                        data={
+                            "From": from_ or self.from_,
+                            "To": f"whatsapp:{to}" if whatsapp else to,
+                            "Body": body,
+                        },
+                    )
+            except httpx.HTTPError as e:
+                raise WhatsAppError(f"Erreur réseau Twilio: {e}") from e
+
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("message", response.text)
+            except ValueError:
+                detail = response.text
+            raise WhatsAppError(f"Erreur Twilio ({response.status_code}): {detail}")
+
+        return response.json()
+
+    async def warm_up(self) -> None:
+        """
+        Établir une connexion keep-alive (TLS compris) vers l'API Twilio.
+        """
+        client = self._get_client()
+        response = await client.get(f"/2010-04-01/Accounts/{self.account_sid}.json")
+        if response.status_code >= 400:
+            raise WhatsAppError(f"Erreur Twilio ({response.status_code}) au préchauffage")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+whatsapp_client = WhatsAppClient(
+    account_sid=settings.twilio_account_sid,
+    auth_token=settings.twilio_auth_token,
+    from_=settings.twilio_whatsapp_from,
+    base_url=settings.twilio_api_base_url,
+    max_connections=settings.twilio_max_connections,
+    max_concurrency=settings.twilio_max_concurrency,
+    timeout=settings.twilio_timeout_seconds,
+)
+
+
+def build_code_message(code: str) -> str:
+    # Message décoré
+    return (
+        "🔐 *Vérification de votre compte*\n\n"
+        f"Bonjour 👋,\n\n"
+        f"Voici votre code de vérification :\n\n"
+        f"👉 *{code}*\n\n"
+        "⏳ Ce code est valide pendant 10 minutes.\n"
+        "🚀 Merci d'utiliser notre service !"
+    )
+
+
+async def send_whatsapp_code(phone: str, code: Optional[str] = None) -> str:
     """
     Envoie un code de vérification via WhatsApp en utilisant Twilio.
     
     :param phone: Numéro du destinataire (ex: '+226XXXXXXXX')
+    :param code: Code à envoyer (généré si absent)
     :return: Le code envoyé
     """
     try:
-        code = generate_code()
-        client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
-
-        # Message décoré
-        message_text = (
-            "🔐 *Vérification de votre compte*\n\n"
-            f"Bonjour 👋,\n\n"
-            f"Voici votre code de vérification :\n\n"
-            f"👉 *{code}*\n\n"
-            "⏳ Ce code est valide pendant 10 minutes.\n"
-            "🚀 Merci d'utiliser notre service !"
-        )
-
-        client.messages.create(
-            body=message_text,
-            from_=settings.twilio_whatsapp_from,
-            to=f"whatsapp:{phone}"
-        )
+        code = code or generate_code()
+        await whatsapp_client.send_message(phone, build_code_message(code))
 
         return code
     
-    except TwilioException as e:
+    except WhatsAppError as e:
         raise Exception(f"Erreur Twilio: {str(e)}")
     except Exception as e:
-        raise Exception(f"Erreur lors de l'envoi WhatsApp: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Erreur lors de l'envoi WhatsApp: {str(e)}")
+
+
+async def send_sms_code(phone: str, code: str) -> str:
+    """
+    Envoie le code par SMS (secours quand WhatsApp est indisponible).
+    """
+    if not settings.twilio_sms_from:
+        raise Exception("Aucun numéro SMS configuré")
+    try:
+        await whatsapp_client.send_message(
+            phone, build_code_message(code), from_=settings.twilio_sms_from, whatsapp=False
+        )
+        return code
+    except WhatsAppError as e:
+        raise Exception(f"Erreur Twilio: {str(e)}")
@@ -0,0 +1,21 @@
+# benchmarks/_env.py
+# Valeurs factices pour pouvoir importer app.config sans fichier .env
+
+import os
+
+DEFAULTS = {
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "visa_bench",
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_PORT": "8025",
+    "SMTP_USER": "bench@example.com",
+    "SMTP_PASSWORD": "bench",
+    "TWILIO_ACCOUNT_SID": "ACbench",
+    "TWILIO_AUTH_TOKEN": "bench",
+    "TWILIO_WHATSAPP_FROM": "whatsapp:+10000000000",
+    # Processus unique : une clé de signature éphémère suffit
+    "JWT_ALLOW_EPHEMERAL_KEY": "true",
+}
+
+for key, value in DEFAULTS.items():
+    os.environ.setdefault(key, value)
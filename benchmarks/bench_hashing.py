@@ -0,0 +1,76 @@
+# benchmarks/bench_hashing.py
+"""
+Mesure le retard de la boucle d'événements pendant des connexions concurrentes.
+
+Compare la vérification bcrypt synchrone (ancien comportement) avec le
+HashingService. Usage :
+
+    python -m benchmarks.bench_hashing --concurrency 32
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import _env  # noqa: F401
+from app.utils.hashing import HashingService, pwd_context
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    """Échantillonne le retard de réveil de la boucle toutes les `interval` secondes."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+async def run(mode: str, concurrency: int, hashed: str, service: HashingService) -> dict:
+    async def inline_verify():
+        return pwd_context.verify("motdepasse", hashed)
+
+    async def pooled_verify():
+        return await service.verify("motdepasse", hashed)
+
+    verify = inline_verify if mode == "inline" else pooled_verify
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = await lag_task
+    lags.sort()
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "lag_p50_ms": round(statistics.median(lags), 2),
+        "lag_max_ms": round(lags[-1], 2),
+    }
+
+
+async def main(args) -> None:
+    hashed = pwd_context.hash("motdepasse")
+    service = HashingService(
+        pwd_context, executor=args.executor, max_workers=args.workers, max_queue=args.concurrency
+    )
+    try:
+        for mode in ("inline", "pooled"):
+            print(await run(mode, args.concurrency, hashed, service))
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,131 @@
+# benchmarks/bench_import.py
+"""
+Mesure le temps d'import de l'application (démarrage d'un worker) avec
+`python -X importtime`, et échoue si une dépendance lourde chargée à la
+demande est importée au démarrage, ou si le temps d'import régresse.
+
+Le temps absolu dépend de la machine : le budget par défaut laisse une
+large marge (environ 850-910 ms mesurés sur un poste de développement).
+Pour détecter une régression plus fine, enregistrer une référence sur la
+même machine puis comparer :
+
+    python -m benchmarks.bench_import --output import_baseline.json
+    python -m benchmarks.bench_import --baseline import_baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks import _env
+
+# Dépendances qui ne doivent être importées qu'au premier usage
+LAZY_MODULES = ["PIL", "aiosmtplib", "httpx", "celery", "twilio"]
+
+# Budget absolu, avec marge au-dessus des mesures de référence
+DEFAULT_BUDGET_MS = 1500.0
+# Dépassement toléré par rapport à une référence (--baseline)
+DEFAULT_TOLERANCE = 0.25
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[Dict[str, int], List[Tuple[str, int, int]]]:
+    """
+    Importer `module` dans un interpréteur neuf et retourner les temps
+    cumulés (µs) des modules de premier niveau et toutes les lignes.
+    """
+    env = {**os.environ, **_env.DEFAULTS}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr[-2000:]}")
+
+    top_level: Dict[str, int] = {}
+    rows: List[Tuple[str, int, int]] = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        rows.append((name, self_us, cumulative_us))
+        if len(indent) <= 1:
+            top_level[name] = cumulative_us
+    return top_level, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--baseline", default=None, help="Résultat JSON de référence (--output) à comparer")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Dépassement toléré par rapport à --baseline (0.25 = +25 %%)")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    # Le meilleur des essais (le premier paie le cache disque et les .pyc)
+    totals = []
+    for _ in range(args.runs):
+        top_level, rows = measure(args.module)
+        totals.append(sum(top_level.values()) / 1000)
+    total_ms = min(totals)
+
+    print(f"Import de {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print("\nModules les plus coûteux (temps propre, dernier essai) :")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulé {cumulative_us / 1000:8.1f} ms)  {name}")
+
+    imported = {name.split(".")[0] for name, _, _ in rows}
+    eager = [name for name in LAZY_MODULES if name in imported]
+
+    failed = False
+    if eager:
+        print(f"\nÉCHEC : importés au démarrage alors qu'ils doivent être chargés à la demande : {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"\nÉCHEC : budget d'import dépassé de {total_ms - args.budget_ms:.0f} ms")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        limit_ms = baseline["import_ms"] * (1 + args.tolerance)
+        change = (total_ms / baseline["import_ms"] - 1) * 100
+        print(f"\nRéférence {args.baseline} ({baseline['meta'].get('platform')}) : "
+              f"{baseline['import_ms']:.0f} ms, {change:+.1f} % (limite {limit_ms:.0f} ms)")
+        if total_ms > limit_ms:
+            print(f"\nÉCHEC : import plus lent que la référence de plus de {args.tolerance * 100:.0f} %")
+            failed = True
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "module": args.module,
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                },
+                "import_ms": total_ms,
+                "eager_lazy_modules": eager,
+            }, f, indent=2)
+        print(f"\nRésultat écrit dans {args.output}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_smtp.py
+"""
+Compare l'envoi SMTP avec une connexion par message (aiosmtplib.send) et
+avec le pool de connexions persistantes, contre un serveur aiosmtpd local.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_smtp --messages 500 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+from benchmarks import _env  # noqa: F401
+from app.utils.email import build_verification_email
+from app.utils.smtp_pool import SMTPConnectionPool
+
+
+class SinkHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def run(name: str, send, messages: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(build_verification_email(f"user{i}@example.com", "123456"))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": name,
+        "messages": messages,
+        "throughput_per_s": round(messages / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def main(args) -> None:
+    controller = Controller(SinkHandler(), hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        async def per_message(message):
+            await aiosmtplib.send(message, hostname="127.0.0.1", port=args.port)
+
+        pool = SMTPConnectionPool("127.0.0.1", args.port, start_tls=False, size=args.pool_size)
+
+        print(await run("per_message", per_message, args.messages, args.concurrency))
+        print(await run("pooled", pool.send, args.messages, args.concurrency))
+        await pool.close()
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8025)
+    asyncio.run(main(parser.parse_args()))
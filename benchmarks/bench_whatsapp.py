@@ -0,0 +1,64 @@
+# benchmarks/bench_whatsapp.py
+"""
+Mesure le nombre d'envois WhatsApp concurrents soutenus par un worker,
+contre un faux serveur Twilio local.
+
+    python -m benchmarks.bench_whatsapp --messages 1000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.fakes import FakeTwilioServer
+from app.utils.whatsapp import WhatsAppClient
+
+
+async def main(args) -> None:
+    server = FakeTwilioServer(delay=args.provider_delay)
+    await server.start()
+
+    client = WhatsAppClient(
+        account_sid="ACbench",
+        auth_token="bench",
+        from_="whatsapp:+10000000000",
+        base_url=server.base_url,
+        max_connections=args.max_connections,
+        max_concurrency=args.concurrency,
+    )
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await client.send_message(f"+2267000{i:04d}", "Code: 123456")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.messages)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.close()
+        await server.stop()
+
+    latencies.sort()
+    print({
+        "messages": args.messages,
+        "concurrency": args.concurrency,
+        "throughput_per_s": round(args.messages / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 2),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--max-connections", type=int, default=20)
+    parser.add_argument("--provider-delay", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+# benchmarks/fakes.py
+"""
+Doublures locales des services externes utilisées par les benchmarks.
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+
+class FakeTwilioServer:
+    """
+    Serveur HTTP/1.1 minimal (keep-alive) imitant l'endpoint Messages de Twilio.
+    `delay` simule la latence du fournisseur.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.05):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                if length:
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                await asyncio.sleep(self.delay)
+
+                body = json.dumps({"sid": f"SM{self.requests:032d}", "status": "queued"}).encode()
+                writer.write(
+                    b"HTTP/1.1 201 Created\r\n"
+                    b"Content-Type: application/json\r\n"
+                    b"Connection: keep-alive\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
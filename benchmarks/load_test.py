@@ -0,0 +1,324 @@
+# benchmarks/load_test.py
+"""
+Banc de charge des endpoints : pilote l'application FastAPI en processus
+(httpx + ASGI) avec une concurrence configurable, contre des doublures
+locales de MongoDB (mongod local ou mongomock-motor en mémoire), du SMTP
+(aiosmtpd) et de Twilio (FakeTwilioServer).
+
+Pour chaque endpoint : débit, latences p50/p95/p99, retard de la boucle
+d'événements et opérations MongoDB par requête. Les résultats sont écrits
+en JSON pour comparer deux versions :
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --requests 500 --concurrency 32 --output results.json
+    python -m benchmarks.load_test --mongo-uri mongodb://localhost:27017 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from benchmarks import _env
+from benchmarks.fakes import FakeTwilioServer
+
+PASSWORD = "MotDePasse123!"
+PIN = "1234"
+# Chiffre distinctif des numéros par lot de comptes (E.164 : +1555 + lot + 6 chiffres)
+PHONE_BATCHES = {"seed": 0, "register": 1}
+
+
+class SinkHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def accept_any_login(server, session, envelope, mechanism, auth_data):
+    from aiosmtpd.smtp import AuthResult
+
+    return AuthResult(success=True)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def measure_lag(stop: asyncio.Event, interval: float = 0.005) -> List[float]:
+    """Échantillonne le retard de réveil de la boucle toutes les `interval` secondes."""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+def configure_environment(args, smtp_port: int, twilio_url: str) -> None:
+    """
+    Pointer l'application vers les doublures locales (avant tout import de app.*).
+    """
+    os.environ.update(_env.DEFAULTS)
+    os.environ.update({
+        "MONGO_URI": args.mongo_uri or _env.DEFAULTS["MONGO_URI"],
+        "DATABASE_NAME": args.database,
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp_port),
+        "SMTP_START_TLS": "false",
+        "TWILIO_API_BASE_URL": twilio_url,
+        "HASH_CALIBRATE": "false",
+        "VERIFICATION_RESEND_COOLDOWN_SECONDS": "0",
+        # Toutes les requêtes viennent du même client : la limitation fausserait la mesure
+        "RATE_LIMIT_ENABLED": "false",
+    })
+
+
+def use_memory_mongo() -> None:
+    """
+    Remplacer le client Motor par mongomock-motor, avant l'import des modules
+    qui lisent `app.db.db` au chargement.
+    """
+    from mongomock_motor import AsyncMongoMockClient
+
+    # Pas de collection plafonnée dans mongomock, donc pas de canal
+    # d'invalidation : le cache des utilisateurs n'est mesuré qu'avec --mongo-uri
+    os.environ["USER_CACHE_MAX_SIZE"] = "0"
+
+    import app.db
+    from app.config import settings
+
+    app.db.client = AsyncMongoMockClient()
+    app.db.raw_db = app.db.client[settings.database_name]
+    app.db.db = app.db.InstrumentedDatabase(app.db.raw_db)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    # Construit les requêtes (arguments de client.request) avant la mesure
+    prepare: Callable[[Any, int], Awaitable[List[Dict[str, Any]]]]
+
+
+def registration_payload(prefix: str, i: int) -> Dict[str, Any]:
+    from app.utils.pin import create_verification_proof
+
+    email = f"{prefix}{i}@example.com"
+    phone = f"+1555{PHONE_BATCHES[prefix]}{i:06d}"
+    return {
+        "email": email,
+        "phone": phone,
+        "name": f"Bench User{i}",
+        "password": PASSWORD,
+        "email_verification_token": create_verification_proof("email", email),
+        "phone_verification_token": create_verification_proof("phone", phone),
+    }
+
+
+async def seed_users(client, count: int, concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Créer des comptes via /final-register (hors mesure).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def register(i: int) -> Dict[str, Any]:
+        async with semaphore:
+            payload = registration_payload("seed", i)
+            response = await client.post("/auth/final-register", json=payload)
+            response.raise_for_status()
+            return {**payload, "id": response.json()["user"]["_id"]}
+
+    return await asyncio.gather(*(register(i) for i in range(count)))
+
+
+def build_scenarios(seeded: List[Dict[str, Any]]) -> Dict[str, Scenario]:
+    async def send_email_code(client, n):
+        return [{"json": {"email": f"code{i}@example.com"}} for i in range(n)]
+
+    async def final_register(client, n):
+        return [{"json": registration_payload("register", i)} for i in range(n)]
+
+    async def login(client, n):
+        return [
+            {"json": {"email": seeded[i % len(seeded)]["email"], "password": PASSWORD}}
+            for i in range(n)
+        ]
+
+    async def set_pin(client, n):
+        return [{"json": {"user_id": seeded[i % len(seeded)]["id"], "pin": PIN}} for i in range(n)]
+
+    return {
+        scenario.name: scenario for scenario in (
+            Scenario("send-email-code", "POST", "/auth/send-email-code", send_email_code),
+            Scenario("final-register", "POST", "/auth/final-register", final_register),
+            Scenario("login", "POST", "/auth/login", login),
+            Scenario("set-pin", "POST", "/auth/set-pin", set_pin),
+        )
+    }
+
+
+async def run_scenario(client, scenario: Scenario, requests: int, concurrency: int) -> Dict[str, Any]:
+    prepared = await scenario.prepare(client, requests)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    mongo_ops: List[int] = []
+
+    async def one(kwargs: Dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path, **kwargs)
+                status = str(response.status_code)
+                if "x-mongo-ops" in response.headers:
+                    mongo_ops.append(int(response.headers["x-mongo-ops"]))
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(kwargs) for kwargs in prepared))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    lags = await lag_task
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_counts": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies), 2),
+        "latency_p95_ms": round(percentile(latencies, 95), 2),
+        "latency_p99_ms": round(percentile(latencies, 99), 2),
+        "latency_max_ms": round(max(latencies), 2),
+        "loop_lag_p50_ms": round(statistics.median(lags), 2),
+        "loop_lag_p99_ms": round(percentile(lags, 99), 2),
+        "loop_lag_max_ms": round(max(lags), 2),
+        "mongo_ops_mean": round(statistics.mean(mongo_ops), 2) if mongo_ops else None,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path: str, current: Dict[str, Any]) -> None:
+    """
+    Afficher l'évolution du débit et du p95 par rapport à un résultat précédent.
+    """
+    with open(previous_path) as f:
+        previous = json.load(f)
+
+    print(f"\nComparaison avec {previous_path} ({previous['meta'].get('git_revision')}) :")
+    for name, result in current["endpoints"].items():
+        before = previous["endpoints"].get(name)
+        if not before:
+            continue
+        throughput = (result["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p95 = (result["latency_p95_ms"] / before["latency_p95_ms"] - 1) * 100
+        print(f"  {name:16s} débit {throughput:+6.1f} %   p95 {p95:+6.1f} %")
+
+
+async def main(args) -> None:
+    from aiosmtpd.controller import Controller
+
+    smtp = Controller(
+        SinkHandler(),
+        hostname="127.0.0.1",
+        port=args.smtp_port,
+        authenticator=accept_any_login,
+        auth_require_tls=False,
+    )
+    smtp.start()
+    twilio = FakeTwilioServer(delay=args.twilio_delay)
+    await twilio.start()
+
+    configure_environment(args, args.smtp_port, twilio.base_url)
+    if not args.mongo_uri:
+        use_memory_mongo()
+
+    import httpx
+    from app.main import app
+    from app.utils.hashing import hasher
+
+    hasher.configure(bcrypt__default_rounds=args.bcrypt_rounds)
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "mongod" if args.mongo_uri else "mongomock",
+            "args": vars(args),
+        },
+        "endpoints": {},
+    }
+
+    if args.mongo_uri:
+        # Base vierge : les comptes d'un essai précédent fausseraient les index uniques
+        from app.db import client as mongo_client
+        await mongo_client.drop_database(args.database)
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                seeded = await seed_users(client, args.seed_users, args.concurrency)
+                scenarios = build_scenarios(seeded)
+                for name in args.endpoints:
+                    result = await run_scenario(client, scenarios[name], args.requests, args.concurrency)
+                    results["endpoints"][name] = result
+                    print(f"{name:16s} {json.dumps(result)}")
+    finally:
+        await twilio.stop()
+        smtp.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nRésultats écrits dans {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoints", nargs="+", default=["send-email-code", "final-register", "login", "set-pin"],
+                        choices=["send-email-code", "final-register", "login", "set-pin"])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-users", type=int, default=100)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--mongo-uri", default=None, help="mongod local (défaut : mongomock-motor en mémoire)")
+    parser.add_argument("--database", default="visa_load_test")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--twilio-delay", type=float, default=0.05)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="Résultat JSON précédent à comparer")
+    args = parser.parse_args()
+    if args.seed_users < 1:
+        sys.exit("--seed-users doit être au moins 1")
+    asyncio.run(main(args))
@@ -0,0 +1,51 @@
+# tests/conftest.py
+# L'application est pilotée en processus contre mongomock-motor :
+# pip install -r requirements.txt
+
+import os
+
+# Avant tout import de app.* (app.config lit l'environnement au chargement)
+os.environ.update({
+    "MONGO_URI": "mongodb://localhost:27017",
+    "DATABASE_NAME": "visa_test",
+    "SMTP_HOST": "127.0.0.1",
+    "SMTP_PORT": "8025",
+    "SMTP_USER": "test@example.com",
+    "SMTP_PASSWORD": "test",
+    "TWILIO_ACCOUNT_SID": "ACtest",
+    "TWILIO_AUTH_TOKEN": "test",
+    "TWILIO_WHATSAPP_FROM": "whatsapp:+10000000000",
+    "JWT_ALLOW_EPHEMERAL_KEY": "true",
+    "HASH_CALIBRATE": "false",
+    "WARMUP_ENABLED": "false",
+    "SHUTDOWN_DRAIN_SECONDS": "0",
+    "RATE_LIMIT_ENABLED": "false",
+    # mongomock ne gère ni collection plafonnée ni change stream : sans canal
+    # d'invalidation, le cache des utilisateurs doit rester désactivé
+    "USER_CACHE_MAX_SIZE": "0",
+})
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.db
+from app.config import settings
+
+# Remplacer le client Motor avant l'import des modules qui lisent `app.db.db`
+app.db.client = AsyncMongoMockClient()
+app.db.raw_db = app.db.client[settings.database_name]
+app.db.db = app.db.InstrumentedDatabase(app.db.raw_db)
+
+from fastapi.testclient import TestClient
+
+from app.main import app as application
+from app.utils.hashing import hasher
+
+# Coût bcrypt minimal : les tests comptent les allers-retours, pas le CPU
+hasher.configure(bcrypt__default_rounds=4)
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(application) as test_client:
+        yield test_client
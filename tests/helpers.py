@@ -0,0 +1,54 @@
+# tests/helpers.py
+# Comptes et appareils créés via l'API pour les tests
+
+import base64
+import itertools
+from typing import Dict
+
+from app.utils.pin import create_verification_proof
+
+PASSWORD = "MotDePasse123!"
+PIN = "1234"
+
+_numbers = itertools.count(1)
+
+
+def next_number() -> int:
+    return next(_numbers)
+
+
+def register(client) -> Dict[str, str]:
+    n = next(_numbers)
+    email = f"user{n}@example.com"
+    phone = f"+1555200{n:04d}"
+    response = client.post("/auth/final-register", json={
+        "email": email,
+        "phone": phone,
+        "name": f"Test User{n}",
+        "password": PASSWORD,
+        "email_verification_token": create_verification_proof("email", email),
+        "phone_verification_token": create_verification_proof("phone", phone),
+    })
+    assert response.status_code == 200, response.text
+    return {"id": response.json()["user"]["_id"], "email": email, "phone": phone}
+
+
+def with_pin(client) -> Dict[str, str]:
+    user = register(client)
+    response = client.post("/auth/set-pin", json={"user_id": user["id"], "pin": PIN})
+    assert response.status_code == 200, response.text
+    return {**user, "token": response.json()["access_token"]}
+
+
+def bearer(user: Dict[str, str]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {user['token']}"}
+
+
+def enroll(client, user: Dict[str, str]) -> Dict[str, str]:
+    response = client.post(
+        "/auth/devices/enroll", headers=bearer(user), json={"device_id": f"device-{next(_numbers)}", "pin": PIN}
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    padded = body["device_secret"] + "=" * (-len(body["device_secret"]) % 4)
+    return {"id": body["device"]["id"], "secret": base64.urlsafe_b64decode(padded)}
@@ -0,0 +1,25 @@
+# tests/test_avatars.py
+
+import pytest
+
+from helpers import bearer, with_pin
+
+UNKNOWN_ID = "0" * 64
+
+
+def avatar_path(client) -> str:
+    return client.get("/auth/me", headers=bearer(with_pin(client))).json()["user"]["avatar"]
+
+
+def test_matching_etag_returns_not_modified(client):
+    path = avatar_path(client)
+    etag = client.get(path).headers["etag"]
+
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(path, headers={"If-None-Match": "*"}).status_code == 304
+
+
+@pytest.mark.parametrize("if_none_match", [None, "*", f'"{UNKNOWN_ID}"', f'"other", "{UNKNOWN_ID}"'])
+def test_unknown_avatar_is_not_found_whatever_the_conditional_headers(client, if_none_match):
+    headers = {"If-None-Match": if_none_match} if if_none_match else {}
+    assert client.get(f"/avatars/{UNKNOWN_ID}", headers=headers).status_code == 404
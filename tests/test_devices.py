@@ -0,0 +1,29 @@
+# tests/test_devices.py
+
+from app.utils.device_auth import compute_response, derive_unlock_key
+from helpers import PIN, bearer, enroll, with_pin
+
+
+def challenge(client, device):
+    token = client.post(f"/auth/devices/{device['id']}/challenge").json()["challenge"]
+    return {"challenge": token, "response": compute_response(derive_unlock_key(device["secret"], PIN), token)}
+
+
+def test_challenge_cannot_be_replayed_after_a_newer_one(client):
+    device = enroll(client, with_pin(client))
+    captured, newer = challenge(client, device), challenge(client, device)
+
+    assert client.post(f"/auth/devices/{device['id']}/unlock", json=captured).status_code == 200
+    assert client.post(f"/auth/devices/{device['id']}/unlock", json=newer).status_code == 200
+    assert client.post(f"/auth/devices/{device['id']}/unlock", json=captured).status_code == 401
+
+
+def test_set_pin_revokes_enrolled_devices(client):
+    user = with_pin(client)
+    device = enroll(client, user)
+
+    assert client.post("/auth/set-pin", json={"user_id": user["id"], "pin": "5678"}).status_code == 200
+
+    assert client.post(f"/auth/devices/{device['id']}/unlock", json=challenge(client, device)).status_code == 401
+    devices = client.get("/auth/devices", headers=bearer(user)).json()["devices"]
+    assert [d["revoked"] for d in devices] == [True]
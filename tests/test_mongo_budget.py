@@ -0,0 +1,132 @@
+# tests/test_mongo_budget.py
+# Chaque endpoint décoré par @mongo_budget(n) doit tenir en n allers-retours
+# MongoDB (en-tête X-Mongo-Ops posé par MongoOpBudgetMiddleware).
+
+import itertools
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.main import app as application
+from app.routes import auth, avatars, devices, jwks
+from app.utils.device_auth import compute_response, derive_unlock_key
+from app.utils.pin import create_verification_proof
+from helpers import PASSWORD, PIN, bearer, enroll, next_number, register, with_pin
+
+
+def budgeted_routes() -> Dict[Tuple[str, str], int]:
+    """(méthode, chemin) -> budget déclaré, pour toutes les routes de l'application."""
+    routes = {}
+    for route in itertools.chain.from_iterable(
+        router.routes for router in (application.router, auth.router, devices.router, avatars.router, jwks.router)
+    ):
+        budget = getattr(getattr(route, "endpoint", None), "__mongo_budget__", None)
+        if isinstance(route, APIRoute) and budget is not None:
+            for method in route.methods:
+                routes[(method, route.path)] = budget
+    return routes
+
+
+BUDGETS = budgeted_routes()
+
+
+def mongo_ops(response) -> int:
+    assert response.status_code < 400, response.text
+    return int(response.headers["x-mongo-ops"])
+
+
+# --- Un ou plusieurs appels représentatifs par endpoint budgété ---
+
+def send_email_code(client):
+    return [client.post("/auth/send-email-code", json={"email": f"new{next_number()}@example.com"})]
+
+
+def final_register(client):
+    n = next_number()
+    email, phone = f"register{n}@example.com", f"+1555300{n:04d}"
+    return [client.post("/auth/final-register", json={
+        "email": email,
+        "phone": phone,
+        "name": "Register User",
+        "password": PASSWORD,
+        "email_verification_token": create_verification_proof("email", email),
+        "phone_verification_token": create_verification_proof("phone", phone),
+    })]
+
+
+def set_pin(client):
+    user = register(client)
+    return [client.post("/auth/set-pin", json={"user_id": user["id"], "pin": PIN})]
+
+
+def verify_pin(client):
+    user = with_pin(client)
+    return [client.post("/auth/verify-pin", json={"user_id": user["id"], "pin": PIN})]
+
+
+def login(client):
+    user = with_pin(client)
+    return [
+        client.post("/auth/login", json={"email": user["email"], "password": PASSWORD}),
+        client.post("/auth/login", json={"phone": user["phone"], "pin": PIN, "device_id": "phone-1"}),
+    ]
+
+
+def me(client):
+    return [client.get("/auth/me", headers=bearer(with_pin(client)))]
+
+
+def logout(client):
+    return [client.post("/auth/logout", headers=bearer(with_pin(client)))]
+
+
+def enroll_device(client):
+    user = with_pin(client)
+    return [client.post("/auth/devices/enroll", headers=bearer(user), json={"device_id": "enroll-1", "pin": PIN})]
+
+
+def unlock(client):
+    user = with_pin(client)
+    device = enroll(client, user)
+    challenge = client.post(f"/auth/devices/{device['id']}/challenge").json()["challenge"]
+    response = compute_response(derive_unlock_key(device["secret"], PIN), challenge)
+    return [client.post(f"/auth/devices/{device['id']}/unlock", json={"challenge": challenge, "response": response})]
+
+
+def list_devices(client):
+    user = with_pin(client)
+    enroll(client, user)
+    return [client.get("/auth/devices", headers=bearer(user))]
+
+
+def delete_device(client):
+    user = with_pin(client)
+    device = enroll(client, user)
+    return [client.delete(f"/auth/devices/{device['id']}", headers=bearer(user))]
+
+
+SCENARIOS: Dict[Tuple[str, str], Callable[..., List]] = {
+    ("POST", "/auth/send-email-code"): send_email_code,
+    ("POST", "/auth/final-register"): final_register,
+    ("POST", "/auth/set-pin"): set_pin,
+    ("POST", "/auth/verify-pin"): verify_pin,
+    ("POST", "/auth/login"): login,
+    ("GET", "/auth/me"): me,
+    ("POST", "/auth/logout"): logout,
+    ("POST", "/auth/devices/enroll"): enroll_device,
+    ("POST", "/auth/devices/{device_key_id}/unlock"): unlock,
+    ("GET", "/auth/devices"): list_devices,
+    ("DELETE", "/auth/devices/{device_key_id}"): delete_device,
+}
+
+
+def test_every_budgeted_route_has_a_scenario():
+    assert set(BUDGETS) == set(SCENARIOS)
+
+
+@pytest.mark.parametrize("route", sorted(BUDGETS), ids=lambda route: f"{route[0]} {route[1]}")
+def test_endpoint_stays_within_mongo_budget(client, route):
+    budget = BUDGETS[route]
+    for response in SCENARIOS[route](client):
+        assert mongo_ops(response) <= budget, f"{route}: {response.headers['x-mongo-ops']} > {budget}"
@@ -0,0 +1,46 @@
+# tests/test_rate_limit.py
+
+from starlette.requests import Request
+
+from app.routes import auth
+from app.utils.admission import gates
+from app.utils.rate_limit import MemoryRateLimiter, RateLimit, client_ip
+
+
+def make_request(forwarded_for=None, peer="10.0.0.2"):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+def test_forwarded_for_is_ignored_without_trusted_proxy():
+    assert client_ip(make_request("203.0.113.7")) == "10.0.0.2"
+
+
+def test_spoofed_leftmost_entries_are_ignored():
+    # Le client envoie « 1.2.3.4 » ; le proxy de confiance ajoute son adresse réelle
+    request = make_request("1.2.3.4, 198.51.100.9")
+    assert client_ip(request, trusted_proxy_hops=1) == "198.51.100.9"
+
+
+def test_nth_entry_from_the_right_with_several_proxies():
+    request = make_request("1.2.3.4, 198.51.100.9, 10.0.0.1")
+    assert client_ip(request, trusted_proxy_hops=2) == "198.51.100.9"
+
+
+def test_short_header_falls_back_to_peer_address():
+    assert client_ip(make_request("198.51.100.9"), trusted_proxy_hops=2) == "10.0.0.2"
+
+
+def test_rate_limited_caller_never_enters_admission_queue(client, monkeypatch):
+    # Seau de compte vide, et classe « login » saturée sans place en file :
+    # la limitation doit répondre 429 avant que l'admission ne réponde 503
+    monkeypatch.setattr(auth, "rate_limiter", MemoryRateLimiter({"account": RateLimit(burst=0, per_minute=1.0)}))
+    gate = gates["login"]
+    monkeypatch.setattr(gate, "in_flight", gate.max_concurrency)
+    monkeypatch.setattr(gate, "max_queue", 0)
+
+    response = client.post("/auth/login", json={"email": "limited@example.com", "password": "x"})
+
+    assert response.status_code == 429
+    assert "retry-after" in response.headers
+    assert gate.queued == 0
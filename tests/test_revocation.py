@@ -0,0 +1,27 @@
+# tests/test_revocation.py
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from mongomock_motor import AsyncMongoMockClient
+
+from app.utils.current_user import RevocationList
+
+
+def test_sync_rereads_revocations_written_during_the_previous_sync():
+    async def scenario():
+        db = AsyncMongoMockClient()["revocation_test"]
+        revocations = RevocationList(db, sync_interval=5.0)
+        before_sync = datetime.now(timezone.utc)
+        await revocations.sync()
+
+        # Révocation datée pendant la lecture précédente (ou par une horloge en retard)
+        await db.revoked_tokens.insert_one({
+            "_id": "late-jti",
+            "expires_at": datetime.now(timezone.utc) + timedelta(hours=1),
+            "revoked_at": before_sync - timedelta(seconds=2),
+        })
+        await revocations.sync()
+        return revocations.is_revoked("late-jti")
+
+    assert asyncio.run(scenario())
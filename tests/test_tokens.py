@@ -0,0 +1,82 @@
+# tests/test_tokens.py
+# Tokens HS256 sans kid signés avec l'ancienne clé d'exemple (publique)
+
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+from app.config import settings
+from app.utils.keyring import LEGACY_PLACEHOLDER_SECRET, keyring, load_legacy_secret
+from helpers import PASSWORD, PIN, bearer, enroll, next_number, with_pin
+
+
+def forge(payload, secret=LEGACY_PLACEHOLDER_SECRET) -> str:
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_forged_access_token_is_rejected_by_me(client):
+    user = with_pin(client)
+    for payload in ({"sub": user["id"]}, {"sub": user["id"], "typ": "access"}):
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {forge(payload)}"})
+        assert response.status_code == 401
+
+
+def test_forged_verification_proofs_are_rejected_by_final_register(client):
+    n = next_number()
+    email, phone = f"forged{n}@example.com", f"+1555400{n:04d}"
+    response = client.post("/auth/final-register", json={
+        "email": email,
+        "phone": phone,
+        "name": "Forged User",
+        "password": PASSWORD,
+        "email_verification_token": forge({"sub": email, "typ": "email_verification"}),
+        "phone_verification_token": forge({"sub": phone, "typ": "phone_verification"}),
+    })
+    assert response.status_code == 400
+
+
+def test_forged_device_challenge_is_rejected_by_unlock(client):
+    device = enroll(client, with_pin(client))
+    challenge = forge({"sub": device["id"], "typ": "device_challenge", "nonce": "forged"})
+    response = client.post(f"/auth/devices/{device['id']}/unlock", json={"challenge": challenge, "response": "00"})
+    assert response.status_code == 401
+
+
+def test_legacy_secret_only_accepts_typed_access_tokens(client, monkeypatch):
+    monkeypatch.setattr(keyring, "legacy_secret", "operator-supplied-legacy-secret-0123456789")
+    user = with_pin(client)
+    exp = datetime.now(timezone.utc) + timedelta(minutes=5)
+
+    untyped = forge({"sub": user["id"], "exp": exp, "jti": "untyped"}, keyring.legacy_secret)
+    access = forge({"sub": user["id"], "typ": "access", "exp": exp, "jti": "access"}, keyring.legacy_secret)
+    proof = forge({"sub": user["email"], "typ": "email_verification"}, keyring.legacy_secret)
+
+    assert client.get("/auth/me", headers=bearer({"token": untyped})).status_code == 401
+    assert client.get("/auth/me", headers=bearer({"token": access})).status_code == 200
+    with pytest.raises(jwt.PyJWTError):
+        keyring.decode(proof)
+
+
+@pytest.mark.parametrize("accept, secret", [
+    (False, LEGACY_PLACEHOLDER_SECRET),
+    (True, LEGACY_PLACEHOLDER_SECRET),
+    (True, None),
+])
+def test_startup_refuses_placeholder_or_missing_legacy_secret(monkeypatch, accept, secret):
+    monkeypatch.setattr(settings, "jwt_accept_legacy_tokens", accept)
+    monkeypatch.setattr(settings, "jwt_legacy_secret", secret)
+    with pytest.raises(ValueError):
+        load_legacy_secret()
+
+
+def test_legacy_tokens_are_off_by_default():
+    assert settings.jwt_accept_legacy_tokens is False
+    assert keyring.legacy_secret is None
+
+
+def test_issued_access_tokens_are_not_printed(client, capsys):
+    user = with_pin(client)
+    verified = client.post("/auth/verify-pin", json={"user_id": user["id"], "pin": PIN})
+    assert verified.status_code == 200
+    assert user["token"] not in capsys.readouterr().out